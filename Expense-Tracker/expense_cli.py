@@ -0,0 +1,197 @@
+# ================================================
+# Expense Tracker - Command Line
+# ================================================
+#
+# The Expense Tracker without a window, for scripts and nightly jobs on a server. Every
+# command works on a JSON ledger (expenses.json) or an SQLite one (a .db file); summaries and
+# exports also read the binary column exports (.npz or a directory of .npy files):
+#   python expense_cli.py add 12.50 "Lunch" Food 2024-03
+#   python expense_cli.py add-many expenses_to_add.json        # a JSON list of expenses, one write
+#   python expense_cli.py import statement.csv --map amount=Debit
+#   python expense_cli.py summary                              # everything
+#   python expense_cli.py summary --month 2024-03
+#   python expense_cli.py summary --from 2024-01 --to 2024-06
+#   python expense_cli.py summary --by-month --json > totals.json   # every month at once
+#   python expense_cli.py export expenses.csv                  # or .json, .db, .npz (NumPy)
+#   python expense_cli.py export columns/                      # one .npy file per column (NumPy)
+#   python expense_cli.py --data expenses.db summary
+#   python expense_cli.py --data expenses.npz summary --by-month
+# Many users, with one small ledger per user and month (see expense_core/expense_shards.py):
+#   python expense_cli.py --data alice.json shard shards --user alice   # copy a ledger into shards/alice/
+#   python expense_cli.py report shards --from 2024-01 --by-user --workers 4
+import argparse
+import json
+import os
+import sys
+import time
+
+from expense_core import DEFAULT_DATA_FILE, Ledger, ShardedLedger, normalize_date
+from expense_core.expense_import import DATE_FORMATS, parse_column_map
+from expense_core.expense_ledger import EXPORT_FORMATS, export_files
+
+
+def print_summary(title, result, as_json):
+    """Prints (total, {category: total}) as text, or returns it as a JSON-ready dict."""
+    total, category_totals = result
+    if as_json:
+        return {"total": total, "categories": category_totals}
+    print(f"{title}: ${total:.2f}")
+    for category, amount in category_totals.items():
+        print(f"  {category}: ${amount:.2f}")
+    return None
+
+
+def command_add(ledger, args):
+    expense = ledger.add(args.amount, args.description, args.category, args.date, date_format=args.date_format)
+    print(f"Added {expense['description']} (${expense['amount']:.2f}, {expense['category']}, {expense['date']}).")
+
+
+def command_add_many(ledger, args):
+    with open(args.file, "r", encoding="utf-8") as file:
+        rows = json.load(file)
+    added = ledger.add_many(rows)
+    print(f"Added {len(added)} expenses.")
+
+
+def command_import(ledger, args):
+    report = ledger.import_csv(args.csv_file, parse_column_map(args.map), args.batch_size,
+                               progress=lambda r: print(f"{r.rows} rows, {r.rows_per_second:,.0f} rows/s",
+                                                        end="\r", file=sys.stderr),
+                               date_format=args.date_format)
+    print(file=sys.stderr)  # Ends the progress line
+    print(report)
+
+
+def command_summary(ledger, args):
+    if args.by_month:
+        results = {month: print_summary(f"Total Expenses for {month}", ledger.monthly_summary(month), args.json)
+                   for month in ledger.months()}
+    elif args.month:
+        month = normalize_date(args.month)
+        results = print_summary(f"Total Expenses for {month}", ledger.monthly_summary(month), args.json)
+    elif args.start or args.end:
+        months = ledger.months()
+        start = normalize_date(args.start) if args.start else (months[0] if months else "0001-01")
+        end = normalize_date(args.end) if args.end else (months[-1] if months else "9999-12")
+        results = print_summary(f"Total Expenses for {start} to {end}", ledger.range_summary(start, end), args.json)
+    else:
+        results = print_summary("Total Expenses", ledger.summary(), args.json)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+def command_export(ledger, args):
+    existing = [name for name in export_files(args.destination, args.format) if os.path.exists(name)]
+    if existing and not args.force:  # A JSON export also replaces the destination's journal
+        raise ValueError(f"{existing[0]} already exists (use --force to replace it)")
+    count = ledger.export(args.destination, args.format)
+    print(f"Exported {count} expenses to {args.destination}.")
+
+
+def command_shard(ledger, args):
+    expenses = list(ledger.iter_expenses())
+    ShardedLedger(args.shards).add_expenses(args.user, expenses)
+    print(f"Added {len(expenses)} expenses to the shards of {args.user} in {args.shards}.")
+
+
+def command_report(ledger, args):
+    start = normalize_date(args.start) if args.start else None
+    end = normalize_date(args.end) if args.end else None
+    report = ShardedLedger(args.shards).report(args.user or None, start, end, args.workers)
+    if args.json:
+        results = print_summary("", (report.total, report.category_totals), True)
+        if args.by_user:
+            results["users"] = {user: print_summary("", totals, True) for user, totals in report.users.items()}
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary("Total Expenses", (report.total, report.category_totals), False)
+        if args.by_user:
+            for user, totals in report.users.items():
+                print_summary(f"Total Expenses for {user}", totals, False)
+    print(report, file=sys.stderr)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Work with an Expense Tracker ledger without opening a window.")
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="ledger file: .json, .db for SQLite, or a read-only .npz / .npy directory")
+    parser.add_argument("--timing", action="store_true", help="print how long the command took (to stderr)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add one expense")
+    add.add_argument("amount")
+    add.add_argument("description")
+    add.add_argument("category")
+    add.add_argument("date", help="YYYY-MM (or YYYY-MM-DD, DD/MM/YYYY, MM/DD/YYYY)")
+    add.add_argument("--date-format", choices=DATE_FORMATS, help="how to read dates like 05/03/2024")
+    add.set_defaults(run=command_add)
+
+    add_many = commands.add_parser("add-many", help="add a JSON list of expenses with a single write")
+    add_many.add_argument("file")
+    add_many.set_defaults(run=command_add_many)
+
+    import_ = commands.add_parser("import", help="import a CSV file (e.g. a bank statement)")
+    import_.add_argument("csv_file")
+    import_.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                         help="use COLUMN for FIELD (amount, description, category or date)")
+    import_.add_argument("--batch-size", type=int, default=10000, help="rows saved per batch")
+    import_.add_argument("--date-format", choices=DATE_FORMATS,
+                         help="how to read dates like 05/03/2024 (without it, such rows are rejected as ambiguous)")
+    import_.set_defaults(run=command_import)
+
+    summary = commands.add_parser("summary", help="total and category breakdown")
+    period = summary.add_mutually_exclusive_group()
+    period.add_argument("--month", help="one month (YYYY-MM)")
+    period.add_argument("--by-month", action="store_true", help="a summary for every month")
+    summary.add_argument("--from", dest="start", help="first month of a range (YYYY-MM)")
+    summary.add_argument("--to", dest="end", help="last month of a range (YYYY-MM)")
+    summary.add_argument("--json", action="store_true", help="print JSON instead of text")
+    summary.set_defaults(run=command_summary)
+
+    export = commands.add_parser("export", help="write every expense to a .csv, .json, .db or .npz file, "
+                                                 "or a directory of .npy files")
+    export.add_argument("destination", help="file name; a name ending in / is a directory of .npy files")
+    export.add_argument("--format", choices=EXPORT_FORMATS, help="format to write (default: from the file name)")
+    export.add_argument("--force", action="store_true", help="replace the destination if it exists")
+    export.set_defaults(run=command_export)
+
+    shard = commands.add_parser("shard", help="copy the ledger into a user's per-month shards")
+    shard.add_argument("shards", help="folder that holds every user's shards")
+    shard.add_argument("--user", required=True)
+    shard.set_defaults(run=command_shard)
+
+    report = commands.add_parser("report", help="totals across the shards of many users")
+    report.add_argument("shards", help="folder that holds every user's shards")
+    report.add_argument("--user", action="append", default=[], help="only this user (can be repeated)")
+    report.add_argument("--from", dest="start", help="first month (YYYY-MM)")
+    report.add_argument("--to", dest="end", help="last month (YYYY-MM)")
+    report.add_argument("--by-user", action="store_true", help="also print each user's totals")
+    report.add_argument("--workers", type=int, default=1, help="processes used to re-read changed shards")
+    report.add_argument("--json", action="store_true", help="print JSON instead of text")
+    report.set_defaults(run=command_report)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    started = time.perf_counter()
+    try:
+        ledger = Ledger(args.data)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        args.run(ledger, args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        ledger.close()
+    if args.timing:
+        print(f"{args.command} took {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+# Expense Tracker core: the expense logic shared by the tkinter tracker, the Qt tracker and
+# expense_cli.py, with no GUI code. Nothing here imports tkinter, Qt or (except the optional
+# column store in expense_columns) NumPy.
+from .expense_analytics import ExpenseAnalytics
+from .expense_import import (CATEGORIES, ImportReport, month_date, normalize_amount, normalize_category,
+                             normalize_date, normalize_expense, normalize_expenses)
+from .expense_latency import LatencyStats
+from .expense_ledger import DEFAULT_DATA_FILE, Ledger
+from .expense_shards import ShardedLedger, ShardReport
+from .expense_sqlite import SqliteStorage
+from .expense_storage import JournalStorage, open_storage
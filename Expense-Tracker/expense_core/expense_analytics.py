@@ -0,0 +1,243 @@
+# Date-range analytics for the Expense Tracker
+#
+# Keeps, for every category, a prefix-sum table over consecutive months:
+#   prefix[category][i] = total spent on `category` in all months before month first + i
+# so the total of any range of months is one subtraction per category, whatever the size
+# of the ledger or the range. A second table per category counts the months that have
+# expenses, so categories with nothing spent in a range are left out of its totals.
+# On top of that it answers month-over-month changes and rolling averages (e.g. over 3
+# or 12 months).
+#
+# The tables are updated as expenses are added. An expense in the latest month costs O(1)
+# per table; one in an earlier month updates the entries after it (O(months), and a ledger
+# covering 20 years has only 240 months).
+# Run this file directly to check the tables against a brute-force scan.
+import math  # For comparing floating point totals
+import random  # For generating sample expenses in the self-check
+import threading  # For reading the tables from background threads while expenses are added
+from array import array  # Compact tables of doubles
+
+
+def month_number(month):
+    """Turns "YYYY-MM" (or a "YYYY-MM-DD" date) into year * 12 + (month - 1), so months can be counted."""
+    year, month = month.split("-")[:2]
+    return int(year) * 12 + int(month) - 1
+
+
+def month_label(number):
+    """Turns a month number back into "YYYY-MM"."""
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+
+class ExpenseAnalytics:
+    """Per-category prefix sums over months, kept up to date as expenses are added.
+
+    summary() has the same shape as SqliteStorage.summary().
+    Safe to read from a background thread while the UI thread adds expenses.
+    """
+
+    def __init__(self, expenses=()):
+        self._lock = threading.Lock()
+        self._first = None  # Month number of prefix index 0
+        self._months = 0  # Number of months covered by the tables (each table has _months + 1 entries)
+        self._prefix = {}  # category -> array("d") of cumulative totals
+        self._counts = {}  # category -> array("l") of how many months before month first + i have expenses
+        self._cells = {}  # month number -> {category: total}, the exact total of each month
+        # Totalled per month first, so building from a whole ledger only ever appends to the tables
+        month_totals = {}
+        for expense in expenses:
+            cell = month_totals.setdefault(month_number(expense["date"]), {})
+            cell[expense["category"]] = cell.get(expense["category"], 0) + expense["amount"]
+        self._add_month_totals(month_totals)
+
+    @classmethod
+    def from_month_totals(cls, month_category_totals):
+        """Builds the tables from {"YYYY-MM": {category: total}} (e.g. a GROUP BY month, category query)."""
+        analytics = cls()
+        analytics._add_month_totals({month_number(month): totals for month, totals in month_category_totals.items()})
+        return analytics
+
+    def _add_month_totals(self, month_totals):
+        """Adds {month number: {category: total}} in month order, which keeps every update O(1)."""
+        with self._lock:
+            for month in sorted(month_totals):
+                for category, total in month_totals[month].items():
+                    self._add(total, category, month)
+
+    # Updating
+    def add(self, expense):
+        """Adds one expense to the tables."""
+        month = month_number(expense["date"])
+        with self._lock:
+            self._add(expense["amount"], expense["category"], month)
+
+    def _add(self, amount, category, month):
+        self._cover(month)
+        table = self._prefix.get(category)
+        if table is None:
+            table = self._prefix[category] = array("d", bytes(8 * (self._months + 1)))  # All zeros
+            self._counts[category] = array("l", [0]) * (self._months + 1)
+        positions = range(month - self._first + 1, self._months + 1)
+        for position in positions:
+            table[position] += amount  # Only the last entry when the expense is in the latest month
+        cell = self._cells.setdefault(month, {})
+        if category not in cell:
+            counts = self._counts[category]  # First expense of this category in this month
+            for position in positions:
+                counts[position] += 1
+        cell[category] = cell.get(category, 0) + amount
+
+    def _cover(self, month):
+        """Grows the tables so they include `month`."""
+        if self._first is None:
+            self._first, self._months = month, 1
+            return
+        if month < self._first:
+            # Earlier months have nothing spent yet, so the new leading entries are zero
+            extra = self._first - month
+            for category, table in self._prefix.items():
+                self._prefix[category] = array("d", bytes(8 * extra)) + table
+                self._counts[category] = array("l", [0]) * extra + self._counts[category]
+            self._first = month
+            self._months += extra
+        elif month >= self._first + self._months:
+            # Later months repeat the running total reached so far
+            extra = month - (self._first + self._months) + 1
+            for tables in (self._prefix, self._counts):
+                for table in tables.values():
+                    table.extend([table[-1]] * extra)
+            self._months += extra
+
+    # Queries
+    def _range_total(self, table, start, end):
+        """Total of one table over month numbers start..end (inclusive), clipped to the covered months."""
+        low = min(max(start - self._first, 0), self._months)
+        high = min(max(end - self._first + 1, 0), self._months)
+        return table[high] - table[low] if high > low else 0.0
+
+    def range_totals(self, start, end):
+        """Returns {category: total} for the "YYYY-MM" months start to end, both included."""
+        start, end = month_number(start), month_number(end)
+        with self._lock:
+            return self._range_totals(start, end)
+
+    def _range_totals(self, start, end):
+        if self._first is None:
+            return {}
+        return {category: self._range_total(table, start, end) for category, table in self._prefix.items()
+                if self._range_total(self._counts[category], start, end) > 0}
+
+    def range_summary(self, start, end):
+        """Returns (total, {category: total}) for the "YYYY-MM" months start to end, both included."""
+        category_totals = self.range_totals(start, end)
+        return sum(category_totals.values()), category_totals
+
+    def summary(self, month=None):
+        """Returns (total, {category: total}) overall or for one "YYYY-MM" month."""
+        with self._lock:
+            if month is None:
+                category_totals = {category: table[-1] for category, table in self._prefix.items()}
+            else:
+                category_totals = dict(self._cells.get(month_number(month), {}))
+        return sum(category_totals.values()), category_totals
+
+    def month_over_month(self, month):
+        """Returns {category: (this month's total, previous month's total)} for a "YYYY-MM" month."""
+        number = month_number(month)
+        with self._lock:
+            current = self._cells.get(number, {})
+            previous = self._cells.get(number - 1, {})
+            return {category: (current.get(category, 0.0), previous.get(category, 0.0))
+                    for category in list(current) + [c for c in previous if c not in current]}
+
+    def rolling_average(self, month, window=3):
+        """Returns {category: average monthly total} over the `window` months ending with a "YYYY-MM" month.
+
+        Months without expenses count as zero.
+        """
+        end = month_number(month)
+        with self._lock:
+            return {category: total / window
+                    for category, total in self._range_totals(end - window + 1, end).items()}
+
+    def monthly_series(self, start, end, category=None):
+        """Returns [("YYYY-MM", total)] for every month from start to end, for one category or all of them."""
+        start, end = month_number(start), month_number(end)
+        with self._lock:
+            tables = list(self._prefix.values()) if category is None else [self._prefix.get(category)]
+            tables = [table for table in tables if table is not None]
+            return [(month_label(number), sum(self._range_total(table, number, number) for table in tables))
+                    for number in range(start, end + 1)]
+
+    def months(self):
+        """Returns the "YYYY-MM" months that have expenses, in order."""
+        with self._lock:
+            return [month_label(number) for number in sorted(self._cells)]
+
+
+def _close(a, b):
+    """Compares two totals, allowing for floating point rounding."""
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+if __name__ == "__main__":
+    # Self-check: random expenses, compared with brute-force scans
+    categories = ["Food", "Transportation", "Entertainment", "Other"]
+    expenses = [{
+        "amount": round(random.uniform(0.5, 500), 2),
+        "description": "sample",
+        "category": random.choice(categories),
+        "date": f"{random.randint(2015, 2024)}-{random.randint(1, 12):02d}",
+    } for _ in range(100000)]
+    analytics = ExpenseAnalytics(expenses)
+
+    def brute_force(start, end):
+        totals = {}
+        for expense in expenses:
+            if start <= month_number(expense["date"]) <= end:
+                totals[expense["category"]] = totals.get(expense["category"], 0) + expense["amount"]
+        return totals
+
+    for _ in range(20):
+        start = random.randint(month_number("2014-06"), month_number("2025-06"))
+        end = random.randint(start, month_number("2025-06"))
+        expected = brute_force(start, end)
+        got = analytics.range_totals(month_label(start), month_label(end))
+        assert got.keys() == expected.keys() and all(_close(got[c], expected[c]) for c in expected), (start, end)
+        got = analytics.rolling_average(month_label(end), 12)
+        expected = brute_force(end - 11, end)
+        assert all(_close(got[c], expected[c] / 12) for c in expected)
+
+    # Full rescan: the total of every category, overall and per month
+    by_month = {}
+    by_category = {}
+    for expense in expenses:
+        cell = by_month.setdefault(expense["date"], {})
+        cell[expense["category"]] = cell.get(expense["category"], 0) + expense["amount"]
+        by_category[expense["category"]] = by_category.get(expense["category"], 0) + expense["amount"]
+    rebuilt = ExpenseAnalytics.from_month_totals(by_month)
+    for tables in (analytics, rebuilt):
+        total, category_totals = tables.summary()
+        assert _close(total, sum(e["amount"] for e in expenses)), "Overall total does not match a full rescan"
+        assert category_totals.keys() == by_category.keys()
+        assert all(_close(category_totals[c], by_category[c]) for c in by_category)
+        assert tables.months() == sorted(by_month)
+        for month, expected in by_month.items():
+            total, got = tables.summary(month)
+            assert got.keys() == expected.keys() and all(_close(got[c], expected[c]) for c in expected), month
+            assert _close(total, sum(expected.values())), month
+    incremental = ExpenseAnalytics()  # Added one by one, out of month order
+    for expense in expenses[:20000]:
+        incremental.add(expense)
+    bulk = ExpenseAnalytics(expenses[:20000])
+    for _ in range(20):
+        start = random.randint(month_number("2014-06"), month_number("2025-06"))
+        end = random.randint(start, month_number("2025-06"))
+        got = incremental.range_totals(month_label(start), month_label(end))
+        expected = bulk.range_totals(month_label(start), month_label(end))
+        assert got.keys() == expected.keys() and all(_close(got[c], expected[c]) for c in expected)
+    gap = ExpenseAnalytics([{"amount": 5.0, "category": "Food", "date": "2024-01"},
+                            {"amount": 7.0, "category": "Food", "date": "2024-04"}])
+    assert gap.range_summary("2024-02", "2024-03") == (0, {}), "Months without expenses must not list categories"
+    print(f"OK: summaries, range, rolling and monthly totals match a full rescan of {len(expenses)} "
+          f"expenses over {len(analytics.months())} months.")
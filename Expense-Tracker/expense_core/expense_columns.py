@@ -0,0 +1,264 @@
+# Columnar expense store for the Expense Tracker (requires NumPy)
+#
+# Instead of one dict per expense, every field is kept in its own array:
+#   amounts           float64
+#   category codes    int16 index into `categories`
+#   month codes       int32, year * 12 + (month - 1)
+#   description codes int32 index into `descriptions` (each distinct text is stored once)
+# Totals and per-category / per-month breakdowns are computed with np.bincount instead of
+# Python loops. Convert a ledger with: python expense_cli.py --data expenses.json export expenses.npz
+# and read it back (read-only) with:   python expense_cli.py --data expenses.npz summary
+#
+# On disk, the category and description texts are kept as one UTF-8 byte array plus an array
+# of offsets, so a single long description doesn't pad every other one to its length.
+import os  # For telling .npz files apart from .npy directories
+
+import numpy as np  # For the column arrays and vectorized group-by
+
+from .expense_analytics import month_label, month_number
+
+NUMERIC_COLUMNS = ("amounts", "category_codes", "month_codes", "description_codes")  # Memory-mapped when loaded
+
+
+def pack_strings(strings):
+    """Returns (UTF-8 bytes as a uint8 array, int64 offsets) for a list of strings; string i is bytes[offsets[i]:offsets[i + 1]]."""
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets):
+    """Turns the arrays made by pack_strings back into a list of strings."""
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+
+class ExpenseColumns:
+    """Expenses stored column by column in NumPy arrays."""
+
+    def __init__(self, categories=()):
+        self._size = 0  # Number of expenses stored
+        self._amounts = np.empty(0, dtype=np.float64)
+        self._category_codes = np.empty(0, dtype=np.int16)
+        self._month_codes = np.empty(0, dtype=np.int32)
+        self._description_codes = np.empty(0, dtype=np.int32)
+        self.categories = []  # code -> category name
+        self._category_lookup = {}  # category name -> code
+        self.descriptions = []  # code -> description text
+        self._description_lookup = {}  # description text -> code
+        for category in categories:
+            self._category_code(category)
+
+    @classmethod
+    def from_records(cls, expenses, categories=()):
+        """Builds the columns from a list of expense dicts (the JSON format)."""
+        columns = cls(categories)
+        columns.extend(expenses)
+        return columns
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def amounts(self):
+        return self._amounts[:self._size]
+
+    @property
+    def category_codes(self):
+        return self._category_codes[:self._size]
+
+    @property
+    def month_codes(self):
+        return self._month_codes[:self._size]
+
+    @property
+    def description_codes(self):
+        return self._description_codes[:self._size]
+
+    def append(self, expense):
+        """Adds one expense dict."""
+        self.extend([expense])
+
+    def extend(self, expenses):
+        """Adds a list of expense dicts, growing the arrays once for the whole batch."""
+        expenses = list(expenses)
+        count = len(expenses)
+        self._reserve(self._size + count)
+        end = self._size + count
+        self._amounts[self._size:end] = [expense["amount"] for expense in expenses]
+        self._category_codes[self._size:end] = [self._category_code(expense["category"]) for expense in expenses]
+        self._month_codes[self._size:end] = [month_number(expense["date"]) for expense in expenses]
+        self._description_codes[self._size:end] = [self._description_code(expense["description"]) for expense in expenses]
+        self._size = end
+
+    def to_records(self):
+        """Returns the expenses as a list of dicts in the JSON format."""
+        return list(self.iter_records())
+
+    def iter_records(self):
+        """Yields the expenses one by one as dicts in the JSON format."""
+        for amount, description, category, month in zip(
+                self.amounts.tolist(), self.description_codes.tolist(),
+                self.category_codes.tolist(), self.month_codes.tolist()):
+            yield {
+                "amount": amount,
+                "description": self.descriptions[description],
+                "category": self.categories[category],
+                "date": month_label(month),
+            }
+
+    def total(self, month=None):
+        """Returns the total spent overall, or in one "YYYY-MM" month."""
+        if month is None:
+            return float(self.amounts.sum())
+        return float(self.amounts[self.month_codes == month_number(month)].sum())
+
+    def category_totals(self, month=None):
+        """Returns a {category: total} dict overall, or for one "YYYY-MM" month."""
+        codes = self.category_codes
+        amounts = self.amounts
+        if month is not None:
+            mask = self.month_codes == month_number(month)
+            codes = codes[mask]
+            amounts = amounts[mask]
+        sums = np.bincount(codes, weights=amounts, minlength=len(self.categories))
+        counts = np.bincount(codes, minlength=len(self.categories))
+        return {self.categories[code]: float(sums[code]) for code in np.flatnonzero(counts)}
+
+    def month_totals(self):
+        """Returns a {"YYYY-MM": total} dict in month order."""
+        months, inverse = np.unique(self.month_codes, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.amounts, minlength=len(months))
+        return {month_label(int(month)): float(total) for month, total in zip(months, sums)}
+
+    def month_category_totals(self):
+        """Returns a {"YYYY-MM": {category: total}} dict, computed with a single bincount over (month, category) pairs."""
+        months, inverse = np.unique(self.month_codes, return_inverse=True)
+        width = len(self.categories)
+        pairs = inverse * width + self.category_codes
+        sums = np.bincount(pairs, weights=self.amounts, minlength=len(months) * width).reshape(len(months), width)
+        counts = np.bincount(pairs, minlength=len(months) * width).reshape(len(months), width)
+        result = {}
+        for row, month in enumerate(months):
+            result[month_label(int(month))] = {
+                self.categories[code]: float(sums[row, code]) for code in np.flatnonzero(counts[row])
+            }
+        return result
+
+    def save(self, path):
+        """Saves the columns in binary form: a single .npz file, or a directory of .npy files that can be memory-mapped."""
+        arrays = {
+            "amounts": self.amounts,
+            "category_codes": self.category_codes,
+            "month_codes": self.month_codes,
+            "description_codes": self.description_codes,
+        }
+        arrays["category_bytes"], arrays["category_offsets"] = pack_strings(self.categories)
+        arrays["description_bytes"], arrays["description_offsets"] = pack_strings(self.descriptions)
+        if path.endswith(".npz"):
+            np.savez(path, **arrays)
+            return
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + ".npy"), array)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Loads columns saved by save(). Directories of .npy files are memory-mapped unless mmap is False."""
+        if path.endswith(".npz"):
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        else:
+            arrays = {}
+            for name in os.listdir(path):
+                if name.endswith(".npy"):
+                    numeric = name[:-4] in NUMERIC_COLUMNS  # The texts are decoded anyway, so only these are mapped
+                    arrays[name[:-4]] = np.load(os.path.join(path, name), mmap_mode='r' if mmap and numeric else None)
+        columns = cls(unpack_strings(arrays["category_bytes"], arrays["category_offsets"]))
+        columns.descriptions = unpack_strings(arrays["description_bytes"], arrays["description_offsets"])
+        columns._description_lookup = {text: code for code, text in enumerate(columns.descriptions)}
+        columns._amounts = arrays["amounts"]
+        columns._category_codes = arrays["category_codes"]
+        columns._month_codes = arrays["month_codes"]
+        columns._description_codes = arrays["description_codes"]
+        columns._size = len(columns._amounts)
+        return columns
+
+    def _reserve(self, capacity):
+        """Grows the arrays (doubling) so they can hold at least `capacity` rows."""
+        if capacity <= len(self._amounts) and self._amounts.flags.writeable:
+            return
+        new_capacity = max(capacity, 2 * len(self._amounts), 16)
+        for name in ("_amounts", "_category_codes", "_month_codes", "_description_codes"):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _category_code(self, category):
+        """Returns the code for a category, adding it if it is new."""
+        code = self._category_lookup.get(category)
+        if code is None:
+            code = self._category_lookup[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _description_code(self, description):
+        """Returns the code for a description, storing each distinct text only once."""
+        code = self._description_lookup.get(description)
+        if code is None:
+            code = self._description_lookup[description] = len(self.descriptions)
+            self.descriptions.append(description)
+        return code
+
+
+class ColumnStorage:
+    """
+    Opens a binary column export (.npz file or a directory of .npy files) as a read-only ledger,
+    with the same reading methods as SqliteStorage. Totals come from the columns' bincount
+    group-bys; the expenses themselves are only turned into dicts when they are iterated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._columns = None  # Loaded on first use
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = ExpenseColumns.load(self.path)
+        return self._columns
+
+    def files(self):
+        """Returns the .npz file or the directory of .npy files."""
+        return [self.path]
+
+    def load(self):
+        """Returns every expense as a list of dicts, in the order they were exported."""
+        return self.columns.to_records()
+
+    def iter_expenses(self):
+        """Yields the expenses one by one."""
+        return self.columns.iter_records()
+
+    def count(self):
+        """Returns the number of stored expenses."""
+        return len(self.columns)
+
+    def month_category_totals(self):
+        """Returns {"YYYY-MM": {category: total}} from one bincount over the columns."""
+        return self.columns.month_category_totals()
+
+    def append_many(self, new_expenses):
+        raise ValueError(f"{self.path} is a read-only column export; add expenses to a .json or .db ledger")
+
+    def append(self, expense):
+        self.append_many([expense])
+
+    def save(self, expenses):
+        self.append_many(expenses)
+
+    def close(self):
+        """Nothing to close: the memory-mapped arrays are released with the columns."""
@@ -0,0 +1,299 @@
+# Bulk import for the Expense Tracker
+#
+# Imports a CSV file (e.g. a bank statement export) into the ledger without opening a window:
+#   python expense_cli.py import statement.csv
+#   python expense_cli.py --data expenses.db import statement.csv --map amount=Debit --map date="Txn Date"
+#
+# The file is read in batches of rows, so memory use doesn't depend on its size. Every row
+# goes through the same checks as the Add Expense tab (normalize_expense) and each batch is
+# written with a single append, i.e. one journal write or one SQLite transaction.
+#
+# Rows are de-duplicated by a hash of their cells and of how many identical rows came before
+# them in the same file, so two real, identical transactions (same day, payee and amount) are
+# both kept. The hashes of imported rows are kept next to the ledger (expenses.json ->
+# expenses.imported), so importing an overlapping statement again only adds the rows that are new.
+import csv  # For parsing the CSV file
+import hashlib  # For hashing rows to find duplicates
+import itertools  # For reading the file in batches
+import math  # For rejecting amounts that aren't finite numbers
+import os  # For the path of the hash file
+import re  # For parsing dates
+import time  # For measuring throughput
+
+CATEGORIES = ["Food", "Transportation", "Entertainment", "Other"]  # List of categories for expenses
+DEFAULT_CATEGORY = "Other"  # Used when a row has no category or one that isn't in CATEGORIES
+BATCH_SIZE = 10000  # Rows per batch; each batch is saved with one write
+MAX_REPORTED_ERRORS = 20  # Invalid rows listed in the report (the rest are only counted)
+
+# Column names recognised in the header row (lower case) for each expense field
+COLUMN_ALIASES = {
+    "amount": ["amount", "debit", "withdrawal", "withdrawal amount", "expense", "value"],
+    "description": ["description", "narration", "details", "particulars", "memo", "payee"],
+    "category": ["category", "type"],
+    "date": ["date", "transaction date", "txn date", "value date", "posted", "posting date"],
+}
+
+# Date formats found in statements; all are stored as "YYYY-MM" like the Add Expense tab does
+DATE_PATTERNS = [
+    re.compile(r"(?P<year>\d{4})[-/.](?P<month>\d{1,2})(?:[-/.]\d{1,2})?"),  # 2024-03, 2024-03-15, 2024/03/15
+    re.compile(r"(?P<first>\d{1,2})[-/.](?P<second>\d{1,2})[-/.](?P<year>\d{4})"),  # 15/03/2024 or 03/15/2024
+    re.compile(r"(?P<month>\d{1,2})[-/.](?P<year>\d{4})"),  # 03/2024
+]
+DATE_FORMATS = ["DD/MM/YYYY", "MM/DD/YYYY"]  # How to read 05/03/2024, where either part could be the month
+CURRENCY_CHARACTERS = "₹$€£ "  # Stripped from amounts ("₹1,250.00" -> 1250.0)
+THOUSANDS_GROUPS = re.compile(r"\d{1,3}(,\d{3})+(\.\d+)?")  # The only place commas are allowed in amounts
+
+
+### Validation (shared with the Add Expense tab) ###
+def month_date(month, year):
+    """Builds the "YYYY-MM" date from the month and year fields. Raises ValueError if they aren't valid."""
+    month, year = month.strip(), year.strip()
+    if not (month.isdigit() and year.isdigit()):
+        raise ValueError("Please enter numeric values for month and year.")
+    if not 1 <= int(month) <= 12 or len(year) != 4:
+        raise ValueError("Please enter a month from 1 to 12 and a four-digit year.")
+    return f"{year}-{month.zfill(2)}"  # `zfill(2)` ensures month is always 2 digits
+
+
+def normalize_date(date, date_format=None):
+    """
+    Turns a date in any of the DATE_PATTERNS formats into "YYYY-MM". Raises ValueError if it can't.
+    Dates like 05/03/2024 are read as `date_format` (one of DATE_FORMATS). Without one they are
+    only accepted when the order is clear (15/03/2024, 03/15/2024 or 03/03/2024).
+    """
+    date = date.strip()
+    for pattern in DATE_PATTERNS:
+        match = pattern.fullmatch(date)
+        if match:
+            if "first" in pattern.groupindex:
+                month = _day_or_month(match.group("first"), match.group("second"), date, date_format)
+            else:
+                month = match.group("month")
+            return month_date(month, match.group("year"))
+    raise ValueError(f"Unrecognised date {date!r}.")
+
+
+def _day_or_month(first, second, date, date_format):
+    """Returns which of the first two parts of a DD/MM/YYYY or MM/DD/YYYY date is the month."""
+    if date_format == "DD/MM/YYYY":
+        return second
+    if date_format == "MM/DD/YYYY":
+        return first
+    if date_format is not None:
+        raise ValueError(f"Unknown date format {date_format!r} (use {' or '.join(DATE_FORMATS)}).")
+    if int(first) > 12 or int(first) == int(second):
+        return second  # Only the second part can be the month (or both are the same)
+    if int(second) > 12:
+        return first
+    raise ValueError(f"Ambiguous date {date!r}: it could be DD/MM/YYYY or MM/DD/YYYY. Please choose a date format.")
+
+
+def normalize_amount(amount):
+    """
+    Turns an amount such as "1,250.00" or "₹99" into a float. Raises ValueError if it isn't a number,
+    has commas other than between groups of three digits ("1,5" is not 15), or is negative.
+    """
+    if isinstance(amount, str):
+        amount = amount.strip(CURRENCY_CHARACTERS)
+        if "," in amount:
+            if not THOUSANDS_GROUPS.fullmatch(amount):
+                raise ValueError("Please enter a valid number for amount (use '.' for decimals).")
+            amount = amount.replace(",", "")
+    try:
+        value = float(amount)
+    except (TypeError, ValueError):
+        raise ValueError("Please enter a valid number for amount.") from None
+    if not math.isfinite(value):
+        raise ValueError("Please enter a valid number for amount.")
+    if value < 0:
+        raise ValueError("Please enter an amount that isn't negative (refunds can't be recorded as expenses).")
+    return value
+
+
+def normalize_category(category):
+    """Returns the matching entry of CATEGORIES (ignoring case), or DEFAULT_CATEGORY."""
+    wanted = (category or "").strip().lower()
+    for known in CATEGORIES:
+        if known.lower() == wanted:
+            return known
+    return DEFAULT_CATEGORY
+
+
+def normalize_expense(amount, description, category, date, date_format=None):
+    """
+    Checks and cleans up one expense and returns it as a ledger dict:
+    {"amount": float, "description": str, "category": one of CATEGORIES, "date": "YYYY-MM"}.
+    Raises ValueError with a message for the user if something is wrong.
+    """
+    description = (description or "").strip()
+    if not description:
+        raise ValueError("Please enter a description.")
+    return {
+        "amount": normalize_amount(amount),
+        "description": description,
+        "category": normalize_category(category),
+        "date": normalize_date(date, date_format),
+    }
+
+
+def normalize_expenses(rows):
+    """
+    Checks and cleans up expenses given as {"amount", "description", "category", "date"} dicts and
+    returns them as ledger dicts. Raises ValueError saying which row is wrong if one is invalid.
+    """
+    expenses = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            expenses.append(normalize_expense(row.get("amount"), row.get("description"),
+                                              row.get("category"), row.get("date") or ""))
+        except ValueError as e:
+            raise ValueError(f"Expense {number}: {e}") from None
+    return expenses
+
+
+### Importing ###
+def row_key(row):
+    """Returns the text that identifies a CSV row: its cells, ignoring whitespace around them."""
+    return "\x1f".join(cell.strip() for cell in row)
+
+
+def row_hash(row, occurrence=1):
+    """
+    Returns a 16-byte hash of a CSV row's cells and its `occurrence` (1 for the first row with
+    these cells in the file, 2 for the second identical one, ...).
+    """
+    key = row_key(row)
+    if occurrence > 1:
+        key += f"\x1e{occurrence}"  # The first occurrence hashes like before, so old .imported files still match
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+def hash_file_for(data_file):
+    """Returns the file that remembers which rows were already imported into `data_file`."""
+    return os.path.splitext(data_file)[0] + ".imported"
+
+
+def load_hashes(path):
+    """Reads the set of imported row hashes (one hex hash per line)."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as file:
+        return {bytes.fromhex(line.strip()) for line in file if line.strip()}
+
+
+def find_columns(header, overrides=None):
+    """
+    Maps each expense field to its column number in the header row.
+    `overrides` is {field: column name} for statements with unusual headings.
+    Raises ValueError if there is no amount, description or date column.
+    """
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        wanted = [overrides[field].strip().lower()] if overrides and field in overrides else aliases
+        for alias in wanted:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    missing = [field for field in ("amount", "description", "date") if field not in columns]
+    if missing:
+        raise ValueError(f"No column for {', '.join(missing)} in the header {header}; use --map FIELD=COLUMN")
+    return columns
+
+
+class ImportReport:
+    """Counts what happened to the rows of one import."""
+
+    def __init__(self):
+        self.rows = 0  # Data rows read (not counting the header)
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []  # "line N: message" for the first MAX_REPORTED_ERRORS invalid rows
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        lines = [f"Read {self.rows} rows in {self.seconds:.2f} s ({self.rows_per_second:,.0f} rows/s): "
+                 f"{self.imported} imported, {self.duplicates} duplicates skipped, {self.invalid} invalid."]
+        lines += self.errors
+        if self.invalid > len(self.errors):
+            lines.append(f"... and {self.invalid - len(self.errors)} more invalid rows")
+        return "\n".join(lines)
+
+
+def import_csv(csv_path, storage, hash_path, overrides=None, batch_size=BATCH_SIZE, progress=None,
+               date_format=None):
+    """
+    Imports the expenses in a CSV file into `storage` (a JournalStorage or an SqliteStorage).
+    Each batch of `batch_size` rows is validated, de-duplicated and saved with one append_many,
+    then its row hashes are added to `hash_path`. `progress(report)` is called after each batch.
+    Dates like 05/03/2024 are read as `date_format` (see normalize_date). Returns an ImportReport.
+    """
+    report = ImportReport()
+    seen = load_hashes(hash_path)
+    occurrences = {}  # row_key -> number of rows with those cells so far in this file
+    started = time.perf_counter()
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:  # utf-8-sig drops a byte order mark
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return report
+        columns = find_columns(header, overrides)
+        category_column = columns.get("category")
+        while True:
+            rows = [(reader.line_num, row) for row in itertools.islice(reader, batch_size)]
+            if not rows:
+                break
+            batch, hashes = [], []
+            for line_number, row in rows:
+                report.rows += 1
+                if not any(cell.strip() for cell in row):
+                    continue  # Blank line
+                key = row_key(row)
+                occurrences[key] = occurrences.get(key, 0) + 1
+                digest = row_hash(row, occurrences[key])
+                if digest in seen:
+                    report.duplicates += 1
+                    continue
+                try:
+                    expense = normalize_expense(
+                        row[columns["amount"]], row[columns["description"]],
+                        row[category_column] if category_column is not None else None,
+                        row[columns["date"]], date_format)
+                except (ValueError, IndexError) as e:
+                    report.invalid += 1
+                    if len(report.errors) < MAX_REPORTED_ERRORS:
+                        message = e if isinstance(e, ValueError) else "missing columns"
+                        report.errors.append(f"line {line_number}: {message}")
+                    continue
+                seen.add(digest)
+                batch.append(expense)
+                hashes.append(digest)
+            # Expenses are saved before their hashes, so a crash in between can only cause a
+            # duplicate on the next import, never a lost expense
+            storage.append_many(batch)
+            if hashes:
+                with open(hash_path, "a") as hash_file:
+                    hash_file.write("".join(digest.hex() + "\n" for digest in hashes))
+            report.imported += len(batch)
+            report.seconds = time.perf_counter() - started
+            if progress is not None:
+                progress(report)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def parse_column_map(mappings):
+    """Turns ["amount=Debit", ...] into {"amount": "Debit", ...}. Raises ValueError for a bad mapping."""
+    overrides = {}
+    for mapping in mappings:
+        field, _, column = mapping.partition("=")
+        if field not in COLUMN_ALIASES or not column:
+            raise ValueError(f"--map expects FIELD=COLUMN with FIELD one of {', '.join(COLUMN_ALIASES)}")
+        overrides[field] = column
+    return overrides
+
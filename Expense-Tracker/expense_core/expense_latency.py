@@ -0,0 +1,25 @@
+# Latency bookkeeping shared by the background task runners of the tkinter tracker
+# (background_tasks.py) and the Qt tracker (workers.py).
+
+
+class LatencyStats:
+    """Latency of one kind of operation, from submission until its result reached the UI."""
+
+    def __init__(self):
+        self.count = 0
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.count += 1
+        self.last_ms = ms
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {"count": self.count, "last_ms": self.last_ms, "mean_ms": self.mean_ms, "max_ms": self.max_ms}
@@ -0,0 +1,241 @@
+# Headless expense ledger
+#
+# Everything the Expense Tracker does with expenses, without a window: adding one or many
+# expenses, summaries (overall, per month, over a range of months), CSV import and export.
+# The tkinter tracker and expense_cli.py both go through a Ledger, so the same code runs on a
+# desktop and in a nightly job on a server.
+#
+#   ledger = Ledger("expenses.db").load()
+#   ledger.add(12.5, "Lunch", "Food", "2024-03")
+#   total, by_category = ledger.monthly_summary("2024-03")
+import csv  # For exporting to CSV
+import os  # For telling export formats apart by file name
+
+from .expense_analytics import ExpenseAnalytics
+from .expense_import import hash_file_for, import_csv, normalize_expense, normalize_expenses, BATCH_SIZE
+from .expense_sqlite import SqliteStorage, sqlite_files
+from .expense_storage import JournalStorage, open_storage
+
+DEFAULT_DATA_FILE = "expenses.json"
+EXPORT_FIELDS = ["amount", "description", "category", "date"]  # Column order of exported CSV files
+EXPORT_FORMATS = ["csv", "json", "db", "npz", "npy"]  # npz and npy are the binary column formats (need NumPy)
+EXPORT_EXTENSIONS = {".csv": "csv", ".npz": "npz", ".db": "db", ".sqlite": "db", ".sqlite3": "db"}
+
+
+def export_format(path):
+    """
+    Picks the export format from a file name: by extension, "npy" (a directory with one .npy file
+    per column) for a name ending in a slash, and "json" for anything else.
+    """
+    if path.endswith(("/", os.sep)):
+        return "npy"
+    return EXPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "json")
+
+
+def export_files(path, format=None):
+    """
+    Returns the files an export to `path` writes or replaces: for a JSON ledger also its journals
+    and lock files, for SQLite its side files. Raises ValueError for a .jsonl (journal) name.
+    """
+    format = format or export_format(path)
+    path = path.rstrip("/" + os.sep) or path
+    if format == "json":
+        return JournalStorage(path).files()
+    if format == "db":
+        return sqlite_files(path)
+    return [path]
+
+
+class Ledger:
+    """
+    One ledger file (JSON with its journal, SQLite, or a read-only column export) plus the
+    per-month totals used by the summaries.
+
+    A JSON ledger is kept in memory as a list of expense dicts. SQLite ledgers and column exports
+    stay on disk; only their totals per month and category are read.
+    """
+
+    def __init__(self, path=DEFAULT_DATA_FILE):
+        self.path = path
+        self.storage = open_storage(path)
+        self.expenses = []  # Every expense of a JSON ledger (empty for SQLite)
+        self.analytics = ExpenseAnalytics()
+        self.loaded = False
+
+    @property
+    def in_database(self):
+        return isinstance(self.storage, SqliteStorage)
+
+    @property
+    def in_memory(self):
+        return isinstance(self.storage, JournalStorage)
+
+    def load(self):
+        """Reads the ledger and builds its monthly tables. Returns the ledger, so Ledger(path).load() works."""
+        if not self.in_memory:
+            analytics = ExpenseAnalytics.from_month_totals(self.storage.month_category_totals())
+            expenses = []
+        else:
+            expenses = self.storage.load()
+            analytics = ExpenseAnalytics(expenses)
+        self.expenses, self.analytics = expenses, analytics
+        self.loaded = True
+        return self
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    @property
+    def _queries_database(self):
+        """True when summaries are answered by indexed SQLite queries instead of loading the monthly tables."""
+        return self.in_database and not self.loaded
+
+    def __len__(self):
+        if not self.in_memory:
+            return self.storage.count()
+        self._ensure_loaded()
+        return len(self.expenses)
+
+    # Adding
+    def add(self, amount, description, category, date, write=True, date_format=None):
+        """Checks, cleans up and adds one expense (see normalize_expense). Returns the expense dict."""
+        expense = normalize_expense(amount, description, category, date, date_format)
+        self.add_expense(expense, write)
+        return expense
+
+    def add_expense(self, expense, write=True):
+        """
+        Adds an expense dict that is already valid. With write=False it is only added in memory
+        and the caller saves it with write() later (the tracker does that on a background thread).
+        A ledger that isn't loaded isn't read just to add to it: the expense is only written.
+        """
+        self._add_expenses([expense], write)
+
+    def add_many(self, rows, write=True):
+        """
+        Adds many expenses given as {"amount", "description", "category", "date"} dicts with a single
+        write. Every row is checked first, so nothing is added if one is invalid (ValueError says which).
+        Returns the cleaned-up expenses.
+        """
+        new_expenses = normalize_expenses(rows)
+        self._add_expenses(new_expenses, write)
+        return new_expenses
+
+    def _add_expenses(self, new_expenses, write):
+        if write:
+            self.write(new_expenses)  # Written first, so a failed write leaves the totals unchanged
+        else:
+            self._ensure_loaded()  # Kept only in memory until write(), so the ledger must be loaded
+        if not self.loaded:
+            return  # Read from storage, with the new expenses, when the ledger is loaded
+        for expense in new_expenses:
+            if self.in_memory:
+                self.expenses.append(expense)
+            self.analytics.add(expense)
+
+    def write(self, new_expenses):
+        """Saves expenses that were added with write=False (one journal write or one transaction)."""
+        self.storage.append_many(new_expenses)
+
+    def import_csv(self, csv_path, overrides=None, batch_size=BATCH_SIZE, progress=None, date_format=None):
+        """Imports a CSV file into the ledger (see expense_import.import_csv). Returns the ImportReport."""
+        report = import_csv(csv_path, self.storage, hash_file_for(self.path), overrides, batch_size, progress,
+                            date_format)
+        if report.imported and self.loaded:
+            self.load()  # Picks up the imported expenses in the totals
+        return report
+
+    # Summaries
+    def summary(self):
+        """Returns (total, {category: total}) over every expense."""
+        if self._queries_database:
+            return self.storage.summary()
+        self._ensure_loaded()
+        return self.analytics.summary()
+
+    def monthly_summary(self, month):
+        """Returns (total, {category: total}) for one "YYYY-MM" month."""
+        if self._queries_database:
+            return self.storage.summary(month)
+        self._ensure_loaded()
+        return self.analytics.summary(month)
+
+    def range_summary(self, start, end):
+        """Returns (total, {category: total}) for the "YYYY-MM" months start to end, both included."""
+        if self._queries_database:
+            return self.storage.range_summary(start, end)
+        self._ensure_loaded()
+        return self.analytics.range_summary(start, end)
+
+    def month_over_month(self, month):
+        """Returns {category: (this month's total, previous month's total)} for a "YYYY-MM" month."""
+        self._ensure_loaded()
+        return self.analytics.month_over_month(month)
+
+    def rolling_average(self, month, window=3):
+        """Returns {category: average monthly total} over the `window` months ending with a "YYYY-MM" month."""
+        self._ensure_loaded()
+        return self.analytics.rolling_average(month, window)
+
+    def months(self):
+        """Returns the "YYYY-MM" months that have expenses, in order."""
+        if self._queries_database:
+            return self.storage.months()
+        self._ensure_loaded()
+        return self.analytics.months()
+
+    # Reading and exporting
+    def iter_expenses(self):
+        """Yields every expense dict, in the order they were added."""
+        if not self.in_memory:
+            return self.storage.iter_expenses()
+        self._ensure_loaded()
+        return iter(self.expenses)
+
+    def export(self, path, format=None):
+        """
+        Writes every expense to `path` in one of EXPORT_FORMATS (default: export_format(path)): a CSV
+        file, a JSON ledger, an SQLite ledger or a binary column format (a .npz file, or a directory
+        of .npy files that can be memory-mapped; needs NumPy). Returns the number of expenses written.
+        """
+        format = format or export_format(path)
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {format!r} (use one of {', '.join(EXPORT_FORMATS)})")
+        source = {os.path.abspath(name) for name in self.storage.files() + [hash_file_for(self.path)]}
+        if any(os.path.abspath(name) in source for name in export_files(path, format)):
+            raise ValueError(f"Can't export a ledger onto itself or its journal and lock files ({path})")
+        path = path.rstrip("/" + os.sep) or path
+        if format == "csv":
+            count = 0
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, EXPORT_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for expense in self.iter_expenses():
+                    writer.writerow(expense)
+                    count += 1
+            return count
+        if format in ("npz", "npy"):
+            if (format == "npz") != path.endswith(".npz"):
+                raise ValueError("Binary .npz exports need a name ending in .npz, and .npy directories one that doesn't")
+            from .expense_columns import ExpenseColumns  # Needs NumPy
+            columns = ExpenseColumns.from_records(self.iter_expenses())
+            columns.save(path)
+            return len(columns)
+        if format == "json":
+            expenses = list(self.iter_expenses())
+            JournalStorage(path).save(expenses)
+            return len(expenses)
+        destination = SqliteStorage(path)
+        try:
+            destination.save(self.iter_expenses())  # Streamed into one transaction
+            return destination.count()
+        finally:
+            destination.close()
+
+    def close(self):
+        """Waits for background journal compaction, or closes the database connections."""
+        if self.in_memory:
+            self.storage.wait_for_compaction()
+        else:
+            self.storage.close()
@@ -0,0 +1,226 @@
+# Sharded ledgers for many users
+#
+# Instead of one expenses.json for everybody, every user gets a folder with one small ledger
+# per month (a JournalStorage, so a snapshot plus its journal):
+#   shards/alice/2024-03.json    shards/alice/2024-03.jsonl
+#   shards/bob/2024-03.json      ...
+#
+# A company-wide report summarizes every shard (in a process pool when there are many) and
+# adds the results up. Each shard's result is cached in shards/.summary_cache.json together
+# with the modification time and size of its files, so running the report again only
+# re-reads the shards that changed since the last run.
+#
+#   shards = ShardedLedger("shards")
+#   shards.add_many("alice", [{"amount": 12.5, "description": "Lunch", "category": "Food", "date": "2024-03"}])
+#   report = shards.report(start="2024-01", end="2024-06", workers=4)
+#   print(report.total, report.category_totals)
+import json  # For the summary cache
+import os  # For walking the shard folders and reading file sizes and times
+import re  # For recognizing shard file names
+import time  # For timing reports
+from concurrent.futures import ProcessPoolExecutor  # For summarizing shards in parallel
+
+from .expense_import import normalize_expense, normalize_expenses
+from .expense_storage import JournalStorage, atomic_write_json
+
+CACHE_FILE = ".summary_cache.json"
+CACHE_VERSION = 1  # Bump when the cached entries change shape, so old caches are ignored
+PARALLEL_MIN_SHARDS = 8  # Fewer stale shards than this are summarized in this process
+SHARD_FILE = re.compile(r"^(\d{4}-\d{2})\.json(?:l(?:\.compacting)?)?$")  # YYYY-MM.json, .jsonl or .jsonl.compacting
+USER_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")  # User names become folder names
+
+
+def shard_signature(path):
+    """
+    Returns the modification time (ns) and size of a shard's snapshot, journal and compacting
+    journal (None for files that don't exist). Any write to the shard changes it.
+    """
+    storage = JournalStorage(path)
+    signature = []
+    for file_path in (storage.data_file, storage.journal_file, storage.compacting_file):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append([stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def summarize_shard(path):
+    """
+    Reads one shard and returns {"count", "total", "categories"} for it. Runs in the
+    worker processes, so it only takes and returns plain (picklable) values. Only reads the
+    files: a torn journal line left by a writer is skipped, not repaired.
+    """
+    category_totals = {}
+    total = 0
+    expenses = JournalStorage(path).read()
+    for expense in expenses:
+        total += expense["amount"]
+        category_totals[expense["category"]] = category_totals.get(expense["category"], 0) + expense["amount"]
+    return {"count": len(expenses), "total": total, "categories": category_totals}
+
+
+class ShardReport:
+    """The merged totals of a report, per user, and how many shards had to be re-read."""
+
+    def __init__(self):
+        self.count = 0  # Expenses covered
+        self.total = 0
+        self.category_totals = {}
+        self.users = {}  # user -> (total, {category: total})
+        self.shards = 0
+        self.reprocessed = 0  # Shards read because they were new or had changed
+        self.seconds = 0.0
+
+    @property
+    def cached(self):
+        return self.shards - self.reprocessed
+
+    def add(self, user, result):
+        """Adds one shard's summary to the overall and per-user totals."""
+        self.count += result["count"]
+        self.total += result["total"]
+        user_total, user_categories = self.users.get(user, (0, {}))
+        for category, amount in result["categories"].items():
+            self.category_totals[category] = self.category_totals.get(category, 0) + amount
+            user_categories[category] = user_categories.get(category, 0) + amount
+        self.users[user] = (user_total + result["total"], user_categories)
+
+    def __str__(self):
+        return (f"{self.shards} shards ({self.reprocessed} re-read, {self.cached} from the cache), "
+                f"{self.count} expenses, in {self.seconds:.2f} s.")
+
+
+class ShardedLedger:
+    """A folder of per-user, per-month ledgers (see the top of this file)."""
+
+    def __init__(self, root):
+        self.root = root
+        self.cache_path = os.path.join(root, CACHE_FILE)
+
+    def shard_path(self, user, month):
+        """Returns the snapshot file of a user's "YYYY-MM" shard."""
+        if not USER_NAME.match(user or ""):
+            raise ValueError(f"{user!r} can't be used as a user name (letters, digits, '_', '.' and '-' only).")
+        return os.path.join(self.root, user, month + ".json")
+
+    # Adding
+    def add(self, user, amount, description, category, date):
+        """Checks, cleans up and adds one expense to a user's shard for its month. Returns the expense dict."""
+        expense = normalize_expense(amount, description, category, date)
+        self.add_expenses(user, [expense])
+        return expense
+
+    def add_many(self, user, rows):
+        """
+        Adds expenses given as {"amount", "description", "category", "date"} dicts to a user's
+        shards. Every row is checked first, so nothing is added if one is invalid. Returns the
+        cleaned-up expenses.
+        """
+        new_expenses = normalize_expenses(rows)
+        self.add_expenses(user, new_expenses)
+        return new_expenses
+
+    def add_expenses(self, user, expenses):
+        """Adds expense dicts that are already valid, with one journal write per month they cover."""
+        by_month = {}
+        for expense in expenses:
+            by_month.setdefault(expense["date"][:7], []).append(expense)
+        for month, month_expenses in by_month.items():
+            path = self.shard_path(user, month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            storage = JournalStorage(path)
+            storage.append_many(month_expenses)
+            storage.wait_for_compaction()
+
+    # Finding shards
+    def users(self):
+        """Returns the user names that have shards, sorted."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root)
+                      if entry.is_dir() and USER_NAME.match(entry.name))
+
+    def shards(self, users=None, start=None, end=None):
+        """
+        Returns (user, "YYYY-MM", snapshot path) for every shard of `users` (default: everyone)
+        in the months start to end (both included; None means no limit), sorted.
+        """
+        found = []
+        for user in users or self.users():
+            folder = os.path.join(self.root, user)
+            if not os.path.isdir(folder):
+                continue
+            months = set()
+            for name in os.listdir(folder):
+                match = SHARD_FILE.match(name)
+                if match:
+                    months.add(match.group(1))  # A shard may only have a journal so far
+            for month in sorted(months):
+                if (start is None or month >= start) and (end is None or month <= end):
+                    found.append((user, month, self.shard_path(user, month)))
+        return found
+
+    # Reports
+    def report(self, users=None, start=None, end=None, workers=1):
+        """
+        Summarizes the shards of `users` in the months start to end and merges the results into a
+        ShardReport. Shards whose files are unchanged since the last report are taken from the
+        cache; the others are re-read, across `workers` processes when there are enough of them.
+        """
+        started = time.perf_counter()
+        cache = self._load_cache()
+        shards = self.shards(users, start, end)
+        signatures = {}
+        stale = []
+        for user, month, path in shards:
+            key = f"{user}/{month}"
+            signatures[key] = shard_signature(path)
+            entry = cache.get(key)
+            if entry is None or entry["signature"] != signatures[key]:
+                stale.append((key, path))
+
+        paths = [path for _, path in stale]
+        if workers > 1 and len(stale) >= PARALLEL_MIN_SHARDS:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(summarize_shard, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        else:
+            results = [summarize_shard(path) for path in paths]
+        for (key, _), result in zip(stale, results):
+            # The signature taken before reading: a write during the report only makes the next one re-read the shard
+            cache[key] = dict(result, signature=signatures[key])
+
+        # Shards in the reported users and months that have been deleted since the last report
+        removed = [key for key in cache if key not in signatures and self._in_scope(key, users, start, end)]
+        for key in removed:
+            del cache[key]
+
+        report = ShardReport()
+        for user, month, _ in shards:
+            report.add(user, cache[f"{user}/{month}"])
+        report.shards = len(shards)
+        report.reprocessed = len(stale)
+        if stale or removed:
+            atomic_write_json(self.cache_path, {"version": CACHE_VERSION, "shards": cache})
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _load_cache(self):
+        """Reads the per-shard results of earlier reports ({"user/YYYY-MM": entry}); {} if there are none."""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}  # No cache yet, or a damaged one: every shard is simply re-read
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data["shards"]
+
+    @staticmethod
+    def _in_scope(key, users, start, end):
+        """Returns True if a "user/YYYY-MM" cache key is one of `users` (None: anyone) in the months start to end."""
+        user, month = key.split("/")
+        return ((users is None or user in users) and (start is None or month >= start)
+                and (end is None or month <= end))
@@ -0,0 +1,168 @@
+# SQLite storage for the Expense Tracker
+#
+# An alternative to expenses.json for ledgers that have grown large. Expenses live in one
+# `expenses` table indexed on (date, category), so:
+#   - adding expenses inserts rows (many at a time in a single transaction),
+#   - summaries are GROUP BY queries run by SQLite, and the summary of a month or a range of
+#     months only reads those months' rows through the index instead of string-matching every
+#     date (expense_cli.py summary --month / --from --to use these without loading anything),
+#   - nothing has to be loaded into memory, however many years of expenses there are.
+#
+# The tracker uses it when DATA_FILE ends in .db / .sqlite / .sqlite3.
+# Copy an existing JSON ledger (and its journal) into a new database with:
+#   python expense_cli.py --data expenses.json export expenses.db
+import sqlite3  # For the database
+import threading  # For one connection per thread
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+SIDE_FILE_SUFFIXES = ("-journal", "-wal", "-shm")  # Files SQLite keeps next to a database
+BATCH_SIZE = 10000  # Rows fetched at a time when reading expenses back
+
+
+def is_sqlite_path(path):
+    """Returns True if `path` names an SQLite ledger."""
+    return path.endswith(SQLITE_SUFFIXES)
+
+
+def sqlite_files(db_file):
+    """Returns the database file and the journal / WAL files SQLite may create next to it."""
+    return [db_file] + [db_file + suffix for suffix in SIDE_FILE_SUFFIXES]
+
+
+def month_range(start, end):
+    """Returns the (low, high) date bounds that select every date in the "YYYY-MM" months start to end with the index.
+
+    Dates are "YYYY-MM" or "YYYY-MM-DD" text, so every date of the months sorts at or after
+    "YYYY-MM" and before "YYYY-MM~" ("~" sorts after "-" and all digits).
+    """
+    return start, end + "~"
+
+
+class SqliteStorage:
+    """Stores expenses in an SQLite database, with the same load/append/save methods as JournalStorage.
+
+    Each thread gets its own connection (SQLite connections can't be shared between threads),
+    and the database runs in WAL mode so summaries can be read while an expense is being written.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._local = threading.local()  # Holds this thread's connection
+        self._connections = []  # Every connection opened, so close() can close them all
+        self._connections_lock = threading.Lock()
+        create_tables(self._connection())
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_file, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    # Same interface as JournalStorage
+    def files(self):
+        """Returns every file that belongs to this ledger."""
+        return sqlite_files(self.db_file)
+
+    def load(self):
+        """Returns every expense as a list of dicts, in the order they were added."""
+        return list(self.iter_expenses())
+
+    def append(self, expense):
+        """Inserts a single expense."""
+        self.append_many([expense])
+
+    def append_many(self, new_expenses):
+        """Inserts several expenses in one transaction."""
+        connection = self._connection()
+        with connection:
+            _insert(connection, new_expenses)
+
+    def save(self, expenses):
+        """Replaces every stored expense with the given list, in one transaction."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM expenses")
+            _insert(connection, expenses)
+
+    # Reading without loading everything
+    def iter_expenses(self, batch_size=BATCH_SIZE):
+        """Yields the expenses one by one, fetching `batch_size` rows at a time."""
+        cursor = self._connection().execute("SELECT amount, description, category, date FROM expenses ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for amount, description, category, date in rows:
+                yield {"amount": amount, "description": description, "category": category, "date": date}
+
+    def count(self):
+        """Returns the number of stored expenses."""
+        return self._connection().execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+    def summary(self, month=None):
+        """Returns (total, {category: total}) overall or for one "YYYY-MM" month, like ExpenseAnalytics.summary."""
+        if month is None:
+            rows = self._connection().execute(
+                "SELECT category, SUM(amount) FROM expenses GROUP BY category ORDER BY MIN(id)")
+        else:
+            return self.range_summary(month, month)
+        category_totals = dict(rows)
+        return sum(category_totals.values()), category_totals
+
+    def range_summary(self, start, end):
+        """Returns (total, {category: total}) for the "YYYY-MM" months start to end, both included."""
+        # The date range is answered from the (date, category) index; only those months' rows are read
+        rows = self._connection().execute(
+            "SELECT category, SUM(amount) FROM expenses WHERE date >= ? AND date < ? "
+            "GROUP BY category ORDER BY MIN(id)", month_range(start, end))
+        category_totals = dict(rows)
+        return sum(category_totals.values()), category_totals
+
+    def month_category_totals(self):
+        """Returns {"YYYY-MM": {category: total}} from one GROUP BY query (small however long the ledger is)."""
+        result = {}
+        rows = self._connection().execute(
+            "SELECT substr(date, 1, 7), category, SUM(amount) FROM expenses GROUP BY 1, 2 ORDER BY 1, MIN(id)")
+        for month, category, total in rows:
+            result.setdefault(month, {})[category] = total
+        return result
+
+    def months(self):
+        """Returns the "YYYY-MM" months that have expenses, in order."""
+        rows = self._connection().execute("SELECT DISTINCT substr(date, 1, 7) FROM expenses ORDER BY 1")
+        return [month for (month,) in rows]
+
+    def close(self):
+        """Closes the connections of every thread that used this storage."""
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+def create_tables(connection):
+    """Creates the expenses table and its (date, category) index if they don't exist."""
+    with connection:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS expenses (
+                id INTEGER PRIMARY KEY,
+                amount REAL NOT NULL,
+                description TEXT NOT NULL,
+                category TEXT NOT NULL,
+                date TEXT NOT NULL
+            )""")
+        connection.execute("CREATE INDEX IF NOT EXISTS expenses_date_category ON expenses (date, category)")
+
+
+def _insert(connection, expenses):
+    """Inserts expense dicts with one executemany (the caller owns the transaction)."""
+    connection.executemany(
+        "INSERT INTO expenses (amount, description, category, date) VALUES (?, ?, ?, ?)",
+        ((expense["amount"], expense["description"], expense["category"], expense["date"])
+         for expense in expenses))
+
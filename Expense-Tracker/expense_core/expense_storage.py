@@ -0,0 +1,327 @@
+# Storage engine for the Expense Tracker
+#
+# The ledger is kept in two files:
+#   expenses.json  - a snapshot of every expense (same list format as before)
+#   expenses.jsonl - a journal; every new expense is appended to it as one JSON line
+#
+# Adding an expense only appends one line, so it costs the same no matter how big the
+# ledger is. Once the journal grows past `compact_threshold` lines it is folded into a
+# new snapshot on a background thread. Every snapshot is written to a temporary file and
+# then renamed over the old one, so a crash can never leave a half-written expenses.json.
+# Two small lock files (expenses.jsonl.lock and expenses.jsonl.compacting.lock) let several
+# processes append to and compact the same ledger safely.
+import contextlib  # For the process_lock context manager
+import json  # For reading and writing JSON data
+import os  # For file paths, renames and fsync
+import tempfile  # For the temporary file used by atomic writes
+import threading  # For background compaction
+
+try:
+    import fcntl  # File locks on Linux and macOS
+except ImportError:
+    fcntl = None
+    import msvcrt  # File locks on Windows
+
+COMPACT_THRESHOLD = 1000  # Number of journal lines that triggers a background compaction
+_UMASK = os.umask(0o022)  # os.umask can only be read by setting it, so it is put straight back
+os.umask(_UMASK)
+
+
+def open_storage(path):
+    """
+    Returns the storage for a ledger file: SqliteStorage for .db / .sqlite / .sqlite3, a read-only
+    ColumnStorage for a .npz file or a directory of .npy files (needs NumPy), JournalStorage otherwise.
+    """
+    from .expense_sqlite import SqliteStorage, is_sqlite_path  # Imported here to avoid a circular import
+    if is_sqlite_path(path):
+        return SqliteStorage(path)
+    if is_column_path(path):
+        from .expense_columns import ColumnStorage  # Needs NumPy
+        return ColumnStorage(path)
+    return JournalStorage(path)
+
+
+def is_column_path(path):
+    """Returns True if `path` names a binary column export: a .npz file or a directory (of .npy files)."""
+    return path.endswith((".npz", "/", os.sep)) or os.path.isdir(path)
+
+
+def atomic_write_json(path, data):
+    """Writes `data` as JSON to `path` so that readers see either the old file or the new one, never a mix."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)  # mkstemp creates the file private (0600); use the usual permissions
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())  # Makes sure the bytes are on disk before the rename
+        os.replace(tmp_path, path)  # Atomic on both POSIX and Windows
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def file_signature(path):
+    """Returns (inode, modification time in ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+@contextlib.contextmanager
+def process_lock(path):
+    """Holds an exclusive lock on the file `path` (created if needed); other processes wait for it."""
+    with open(path, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)  # Released when the file is closed
+            yield
+            return
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # Gives up after about 10 seconds
+                break
+            except OSError:
+                pass
+        try:
+            yield
+        finally:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_directory(directory):
+    """Flushes the directory entry after a rename (not supported on Windows, where it is skipped)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalStorage:
+    """Snapshot + append-only journal storage for the list of expenses.
+
+    Each journal line looks like {"n": 41, "expense": {...}} where `n` is the position of the
+    expense in the ledger. When replaying, lines whose position is already covered by the
+    snapshot are skipped, which makes compaction safe to interrupt at any point.
+
+    Several processes may use the same ledger (e.g. the tracker and expense_cli.py). Appends
+    take a lock file and number their lines after what is on disk at that moment, so no
+    expense is skipped on replay, whether or not this storage was loaded first.
+    """
+
+    def __init__(self, data_file, journal_file=None, compact_threshold=COMPACT_THRESHOLD):
+        if journal_file is None and data_file.lower().endswith(".jsonl"):
+            # Its journal would be the data file itself, and saving a snapshot would delete it
+            raise ValueError(f"{data_file} is the name of a journal; use the ledger's .json file name instead")
+        self.data_file = data_file
+        self.journal_file = journal_file or os.path.splitext(data_file)[0] + ".jsonl"
+        # While a compaction runs, the journal being folded is moved aside to this file
+        self.compacting_file = self.journal_file + ".compacting"
+        self.journal_lock_file = self.journal_file + ".lock"  # Held while appending to or moving the journal
+        self.snapshot_lock_file = self.compacting_file + ".lock"  # Held while rewriting the snapshot
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()  # Serializes journal appends and rotations
+        self._snapshot_lock = threading.Lock()  # Serializes snapshot rewrites (always taken before _lock)
+        self._snapshot_length = None  # (file signature, number of expenses) of the snapshot last read or written
+        self._journal_lines = 0  # Lines in the live journal
+        self._compactor = None  # The running background compaction thread, if any
+
+    def files(self):
+        """Returns every file that belongs to this ledger: snapshot, journals and lock files."""
+        return [self.data_file, self.journal_file, self.compacting_file, self.journal_lock_file, self.snapshot_lock_file]
+
+    def load(self):
+        """Loads the snapshot and replays the journal on top of it. Returns the list of expenses."""
+        with self._snapshot_lock, process_lock(self.snapshot_lock_file), self._lock, process_lock(self.journal_lock_file):
+            expenses = self._read_snapshot()
+            self._replay(self.compacting_file, expenses)
+            self._journal_lines = self._replay(self.journal_file, expenses)
+        return expenses
+
+    def read(self):
+        """
+        Reads the expenses like load() but without taking locks or repairing anything: a torn last
+        journal line (e.g. an append still being written) is left alone and not counted. For readers
+        such as reports, which must not change the files.
+        """
+        while True:
+            before = (file_signature(self.data_file), file_signature(self.compacting_file))
+            expenses = self._read_snapshot()
+            self._replay(self.compacting_file, expenses, repair=False)
+            self._replay(self.journal_file, expenses, repair=False)
+            if (file_signature(self.data_file), file_signature(self.compacting_file)) == before:
+                return expenses  # No compaction moved the files while they were read
+
+    def append(self, expense):
+        """Appends a single expense to the journal."""
+        self.append_many([expense])
+
+    def append_many(self, new_expenses):
+        """Appends several expenses to the journal with a single write and fsync."""
+        if not new_expenses:
+            return
+        with self._lock, process_lock(self.journal_lock_file):
+            count = self._count_on_disk()
+            lines = [json.dumps({"n": count + offset, "expense": expense}) + "\n"
+                     for offset, expense in enumerate(new_expenses)]
+            with open(self.journal_file, 'a') as file:
+                file.write("".join(lines))
+                file.flush()
+                os.fsync(file.fileno())
+            self._journal_lines += len(lines)
+            needs_compaction = self._journal_lines >= self.compact_threshold
+        if needs_compaction:
+            self.compact_in_background()
+
+    def save(self, expenses):
+        """Writes the whole list as a new snapshot and empties the journal."""
+        with self._snapshot_lock, process_lock(self.snapshot_lock_file), self._lock, process_lock(self.journal_lock_file):
+            atomic_write_json(self.data_file, expenses)
+            self._remember_snapshot(len(expenses))
+            self._remove(self.compacting_file)
+            self._remove(self.journal_file)
+            self._journal_lines = 0
+
+    def compact(self):
+        """Folds the journal into a new snapshot. Appends may continue while this runs."""
+        with self._snapshot_lock, process_lock(self.snapshot_lock_file):
+            with self._lock, process_lock(self.journal_lock_file):
+                # Move the live journal aside; new appends start a fresh journal file.
+                # If an earlier compaction was interrupted, finish folding its file first.
+                if not os.path.exists(self.compacting_file) and os.path.exists(self.journal_file):
+                    os.replace(self.journal_file, self.compacting_file)
+                    self._journal_lines = 0
+            expenses = self._read_snapshot()
+            self._replay(self.compacting_file, expenses)
+            atomic_write_json(self.data_file, expenses)
+            self._remember_snapshot(len(expenses))
+            self._remove(self.compacting_file)
+
+    def compact_in_background(self):
+        """Starts a compaction on a daemon thread unless one is already running."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="expense-compactor", daemon=True)
+        self._compactor.start()
+
+    def wait_for_compaction(self, timeout=None):
+        """Blocks until a running background compaction has finished."""
+        if self._compactor is not None:
+            self._compactor.join(timeout)
+
+    def _count_on_disk(self):
+        """
+        Returns the number of expenses in the ledger files, i.e. the position of the next journal
+        entry. Called with the journal lock held, so no other process is halfway through an append.
+        """
+        last = self._last_position(self.journal_file)
+        if last is None:
+            last = self._last_position(self.compacting_file)
+        if last is not None:
+            # Journal lines are numbered after everything in the snapshot (a compaction only adds
+            # lines that come before them), so the snapshot doesn't have to be read
+            return last + 1
+        # No journal: the snapshot is only parsed when it changed since it was last read or written here
+        signature = file_signature(self.data_file)
+        if signature is None:
+            return 0
+        if self._snapshot_length is None or self._snapshot_length[0] != signature:
+            self._read_snapshot()
+        return self._snapshot_length[1]
+
+    def _last_position(self, path):
+        """
+        Returns the `n` of the last complete line of a journal file, or None if it has none.
+        A torn last line (left by a crash, as the journal lock is held) is cut off first so the
+        next append starts on a clean line.
+        """
+        try:
+            file = open(path, 'r+b')
+        except FileNotFoundError:
+            return None
+        with file:
+            size = file.seek(0, os.SEEK_END)
+            start = max(0, size - 65536)  # Journal lines are short; the last 64 KiB is plenty
+            while True:
+                file.seek(start)
+                data = file.read()
+                lines = data.split(b"\n")
+                if data and not data.endswith(b"\n"):
+                    good_end = start + len(data) - len(lines[-1])
+                    file.truncate(good_end)
+                    file.flush()
+                    os.fsync(file.fileno())
+                complete = lines[:-1] if start == 0 else lines[1:-1]  # The first piece may be part of a line
+                if complete or start == 0:
+                    break
+                start = 0
+        for raw_line in reversed(complete):
+            try:
+                return json.loads(raw_line)["n"]
+            except ValueError:
+                continue
+        return None
+
+    def _remember_snapshot(self, length):
+        """Records the length of the snapshot just written, so appends don't have to parse it."""
+        self._snapshot_length = (file_signature(self.data_file), length)
+
+    def _read_snapshot(self):
+        """Reads the snapshot file (a plain JSON list, so old expenses.json files load unchanged)."""
+        signature = file_signature(self.data_file)
+        try:
+            with open(self.data_file, 'r') as file:
+                expenses = json.load(file)
+        except FileNotFoundError:
+            expenses = []
+        self._snapshot_length = (signature, len(expenses))
+        return expenses
+
+    def _replay(self, path, expenses, repair=True):
+        """
+        Appends the journal entries in `path` that are not yet part of `expenses`. Returns the
+        line count. A torn last line is cut off when `repair` is true, and only skipped otherwise.
+        """
+        lines = 0
+        good_end = 0  # Byte offset just after the last complete line
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with file:
+            for raw_line in file:
+                if not raw_line.endswith(b"\n"):
+                    break  # A torn write from a crash; everything before it is intact
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    break
+                if entry["n"] >= len(expenses):
+                    expenses.append(entry["expense"])
+                good_end += len(raw_line)
+                lines += 1
+        if repair and good_end != os.path.getsize(path):
+            # Drop the damaged tail so later appends start on a clean line
+            with open(path, 'r+b') as file:
+                file.truncate(good_end)
+        return lines
+
+    @staticmethod
+    def _remove(path):
+        """Deletes a file if it exists."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
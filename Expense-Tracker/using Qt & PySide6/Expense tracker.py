@@ -1,11 +1,34 @@
 #Dependencies
+import os
 import sys
-from PySide6.QtCore import Qt, Slot
+# expense_core lives one folder up, instrumentation.py at the top of the repository
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(2, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+import instrumentation
+instrumentation.configure()  # On with INSTRUMENT=FILE or --instrument[=FILE]; see instrumentation.py
+from instrumentation import instrument
+from PySide6.QtCore import Slot
 from PySide6.QtGui import QAction, QPainter
 from PySide6.QtWidgets import (QApplication, QHeaderView, QHBoxLayout, QLabel,
-                               QLineEdit, QMainWindow, QPushButton, QTableWidget, QTableWidgetItem,
+                               QLineEdit, QMainWindow, QPushButton, QTableView,
                                QVBoxLayout, QWidget)
-from PySide6.QtCharts import QChartView, QPieSeries, QChart
+from PySide6.QtCharts import QChartView
+from expense_model import ExpenseTableModel
+from expense_chart import ExpensePieChart, bucket_totals
+from workers import TaskRunner
+from expense_core import normalize_amount  # The same amount check as the tkinter tracker and expense_cli.py
+
+
+@instrument
+def parse_rows(data):
+    """Turns {description: amount} into (description, float amount) pairs, skipping bad amounts."""
+    rows = []
+    for description, amount in data.items():
+        try:
+            rows.append((str(description), normalize_amount(amount)))
+        except ValueError:
+            print(f"Skipping {description!r}: {amount!r} is not a number")
+    return rows
 
 class Widget(QWidget):
     def __init__(self):
@@ -14,18 +37,25 @@ class Widget(QWidget):
         # Dummy data
         self._data = {"water": 24, "rent": 1000, "coffee": 30}
 
-        # Initialize item counter
-        self.items = 0
-
         # Left Widget
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Description", "Expense"])
+        # The model holds the expenses; the view only asks it for the rows on screen
+        self.model = ExpenseTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights, so the view never measures every row of a large model
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
         # Chart View
         self.chart_view = QChartView()
         self.chart_view.setRenderHint(QPainter.Antialiasing)
+        # One chart for the lifetime of the widget; plot_data only updates its slices
+        self.pie_chart = ExpensePieChart()
+
+        # Parsing and chart bucketing run on worker threads; results come back to this thread
+        self.tasks = TaskRunner(self)
+        self.tasks.latencyRecorded.connect(self.show_latency)
+        self.status = QLabel("")
 
         # QWidget Layout
         self.layout = QHBoxLayout()
@@ -50,6 +80,7 @@ class Widget(QWidget):
         self.right.addWidget(self.chart_view)
         self.right.addWidget(self.clear)
         self.right.addWidget(self.quit)
+        self.right.addWidget(self.status)
 
         # Adding right side layout to main layout
         self.layout.addLayout(self.right)
@@ -66,20 +97,15 @@ class Widget(QWidget):
         self.expense.textChanged[str].connect(self.check_disable)
 
     # Add Element To the Table
+    @instrument
     def add_element(self):
         des = self.description.text()
         expense = self.expense.text()
         try:
-            expense_item = QTableWidgetItem(f"{float(expense):.2f}")
-            expense_item.setTextAlignment(Qt.AlignRight)
-
-            self.table.insertRow(self.items)
-            self.table.setItem(self.items, 0, QTableWidgetItem(des))
-            self.table.setItem(self.items, 1, expense_item)
+            self.model.add_expense(des, normalize_amount(expense))
 
             self.description.setText("")
             self.expense.setText("")
-            self.items += 1
         except ValueError:
             print("That is a wrong input. Please enter a number!")
 
@@ -88,35 +114,43 @@ class Widget(QWidget):
         self.add.setEnabled(bool(self.description.text()) and bool(self.expense.text()))
 
     @Slot()
+    @instrument
     def plot_data(self):
-        # Get table information
-        series = QPieSeries()
-        for i in range(self.table.rowCount()):
-            text = self.table.item(i, 0).text()
-            number = float(self.table.item(i, 1).text())
-            series.append(text, number)
-        
-        chart = QChart()
-        chart.addSeries(series)
-        chart.legend().setAlignment(Qt.AlignLeft)
-        self.chart_view.setChart(chart)
+        # Use the running totals kept by the model instead of reading the table.
+        # A copy goes to the worker so rows added meanwhile can't change it mid-sort;
+        # clicking Plot again before it finishes replaces the pending request.
+        totals = dict(self.model.description_totals())
+        self.tasks.submit("plot", bucket_totals, totals, on_done=self.show_chart, on_error=self.show_error)
+
+    @instrument
+    def show_chart(self, shown):
+        # Drawing has to happen on the GUI thread
+        self.pie_chart.show(shown)
+        if self.chart_view.chart() is not self.pie_chart.chart:
+            self.chart_view.setChart(self.pie_chart.chart)
+
+    def show_error(self, error):
+        self.status.setText(f"Error: {error}")
+
+    @Slot(str, float)
+    def show_latency(self, name, ms):
+        self.status.setText(f"{name}: {ms:.0f} ms")
 
     @Slot()
     def quit_application(self):
         QApplication.quit()
 
+    @instrument
     def fill_table(self, data=None):
         data = self._data if not data else data
-        for desc, exp in data.items():
-            self.table.insertRow(self.items)
-            self.table.setItem(self.items, 0, QTableWidgetItem(desc))
-            self.table.setItem(self.items, 1, QTableWidgetItem(str(exp)))
-            self.items += 1
+        # Parse in the background, then one bulk insert for all rows.
+        # Loads are ordered so several fill_table calls keep their order.
+        self.tasks.submit_ordered("load", parse_rows, dict(data), on_done=self.model.add_expenses,
+                                  on_error=self.show_error)
 
     @Slot()
     def clear_table(self):
-        self.table.setRowCount(0)
-        self.items = 0
+        self.model.clear()
 
 
 class MainWindow(QMainWindow):
@@ -150,4 +184,6 @@ if __name__ == "__main__":
     window.show()
 
     # Execute application
-    sys.exit(app.exec())
+    status = app.exec()
+    window.centralWidget().tasks.shutdown()
+    sys.exit(status)
@@ -0,0 +1,48 @@
+#Dependencies
+import heapq
+from PySide6.QtCore import Qt
+from PySide6.QtCharts import QChart, QPieSeries
+
+MAX_SLICES = 12  # Largest descriptions shown as their own slice
+MIN_SHARE = 0.01  # Descriptions under this share of the total go into "Other"
+OTHER_LABEL = "Other"
+
+
+def bucket_totals(totals, max_slices=MAX_SLICES, min_share=MIN_SHARE):
+    """Keeps the largest totals and sums the rest (and anything tiny) into one "Other" entry."""
+    grand_total = sum(totals.values())
+    if grand_total <= 0:
+        return {}
+    largest = heapq.nlargest(max_slices, totals.items(), key=lambda item: item[1])
+    shown = {description: value for description, value in largest if value >= grand_total * min_share}
+    rest = grand_total - sum(shown.values())
+    if rest > grand_total * 1e-9:
+        shown[OTHER_LABEL] = shown.get(OTHER_LABEL, 0.0) + rest
+    return shown
+
+
+class ExpensePieChart:
+    """One QChart and QPieSeries that are kept and updated slice by slice on every plot."""
+
+    def __init__(self):
+        self.series = QPieSeries()
+        self.chart = QChart()
+        self.chart.addSeries(self.series)
+        self.chart.legend().setAlignment(Qt.AlignLeft)
+        self._slices = {}  # label -> QPieSlice currently in the series
+
+    def update(self, totals):
+        """Shows {description: total}; only slices whose value changed are touched."""
+        self.show(bucket_totals(totals))
+
+    def show(self, shown):
+        """Shows totals that were already bucketed (e.g. by bucket_totals on a worker thread)."""
+        for label in list(self._slices):
+            if label not in shown:
+                self.series.remove(self._slices.pop(label))  # remove() also deletes the slice
+        for label, value in shown.items():
+            pie_slice = self._slices.get(label)
+            if pie_slice is None:
+                self._slices[label] = self.series.append(label, value)
+            elif pie_slice.value() != value:
+                pie_slice.setValue(value)
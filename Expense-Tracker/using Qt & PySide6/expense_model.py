@@ -0,0 +1,96 @@
+#Dependencies
+from array import array
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class ExpenseTableModel(QAbstractTableModel):
+    """Table model for the expenses, stored column by column.
+
+    Amounts live in one array of doubles and descriptions are interned: each distinct
+    text is stored once and rows keep an integer code for it. The view only asks for
+    the rows it is showing, so no per-cell item objects are ever created.
+    Running totals per description are kept up to date for the chart.
+    """
+
+    HEADERS = ["Description", "Expense"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._amounts = array("d")
+        self._description_codes = array("l")
+        self._descriptions = []  # code -> description text
+        self._description_lookup = {}  # description text -> code
+        self._totals = {}  # description text -> total amount
+
+    # Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._amounts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return self._descriptions[self._description_codes[row]]
+            return f"{self._amounts[row]:.2f}"
+        if role == Qt.TextAlignmentRole and index.column() == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    # Adding and removing expenses
+    def add_expense(self, description, amount):
+        self.add_expenses([(description, amount)])
+
+    def add_expenses(self, expenses):
+        """Appends (description, amount) pairs with a single beginInsertRows/endInsertRows."""
+        codes = array("l")
+        amounts = array("d")
+        for description, amount in expenses:
+            codes.append(self._code(description))
+            amounts.append(float(amount))
+            self._totals[description] = self._totals.get(description, 0.0) + amounts[-1]
+        if not amounts:
+            return
+        first = len(self._amounts)
+        self.beginInsertRows(QModelIndex(), first, first + len(amounts) - 1)
+        self._description_codes.extend(codes)
+        self._amounts.extend(amounts)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._amounts = array("d")
+        self._description_codes = array("l")
+        self._descriptions = []
+        self._description_lookup = {}
+        self._totals = {}
+        self.endResetModel()
+
+    # Reading expenses back
+    def description(self, row):
+        return self._descriptions[self._description_codes[row]]
+
+    def amount(self, row):
+        return self._amounts[row]
+
+    def description_totals(self):
+        """Returns the running {description: total} dict (read-only use)."""
+        return self._totals
+
+    def _code(self, description):
+        code = self._description_lookup.get(description)
+        if code is None:
+            code = self._description_lookup[description] = len(self._descriptions)
+            self._descriptions.append(description)
+        return code
@@ -0,0 +1,101 @@
+# Background tasks for the Qt Expense Tracker: slow work runs on QThreadPool threads and
+# its result comes back to the GUI thread through a queued signal, where widgets can be updated.
+
+#Dependencies
+import itertools
+import sys
+import time
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from expense_core.expense_latency import LatencyStats  # Shared with the tkinter tracker's background_tasks.py
+
+
+class _TaskSignals(QObject):
+    # task id, result, exception (None on success)
+    finished = Signal(int, object, object)
+
+
+class _Task(QRunnable):
+    """Runs one function on a pool thread and reports the outcome through a signal."""
+
+    def __init__(self, task_id, function, args, signals):
+        super().__init__()
+        self.setAutoDelete(False)  # The runner keeps the task until its result is delivered
+        self.task_id = task_id
+        self.function = function
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+        try:
+            result, error = self.function(*self.args), None
+        except Exception as e:
+            result, error = None, e
+        self.signals.finished.emit(self.task_id, result, error)
+
+
+class TaskRunner(QObject):
+    """Runs functions on QThreadPool threads and delivers their results on the GUI thread.
+
+    Tasks are submitted under a name. A new submit() with the same name supersedes the
+    previous task: it is taken off the pool if it hasn't started, and its result is dropped
+    if it has. submit_ordered() tasks run one at a time in submission order and are never
+    dropped. The time from submission to delivery is recorded per name in `latency`.
+    """
+
+    latencyRecorded = Signal(str, float)  # name, milliseconds
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.ordered_pool = QThreadPool(self)
+        self.ordered_pool.setMaxThreadCount(1)  # One thread, so ordered tasks run first come, first served
+        self._signals = _TaskSignals(self)  # Lives in the GUI thread, so emits from workers are queued to it
+        self._signals.finished.connect(self._finished)
+        self._ids = itertools.count(1)
+        self._tasks = {}  # task id -> (name, task, ordered, started, on_done, on_error)
+        self._latest = {}  # name -> id of the newest submit() task with that name
+        self.latency = {}  # name -> LatencyStats
+
+    def submit(self, name, function, *args, on_done=None, on_error=None):
+        """Runs function(*args) in the background; on_done(result) or on_error(exception) runs on the GUI thread."""
+        previous = self._latest.get(name)
+        if previous in self._tasks and self.pool.tryTake(self._tasks[previous][1]):
+            del self._tasks[previous]  # Hadn't started yet, so it never will
+        self._latest[name] = self._start(self.pool, name, False, function, args, on_done, on_error)
+
+    def submit_ordered(self, name, function, *args, on_done=None, on_error=None):
+        """Runs function(*args) on the ordered pool, after every ordered task submitted before it."""
+        self._start(self.ordered_pool, name, True, function, args, on_done, on_error)
+
+    def latency_report(self):
+        """Returns {name: {"count", "last_ms", "mean_ms", "max_ms"}} for every operation so far."""
+        return {name: stats.as_dict() for name, stats in self.latency.items()}
+
+    def shutdown(self):
+        """Drops queued tasks and waits for the running ones, so no ordered task is cut off halfway."""
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.ordered_pool.waitForDone()
+
+    def _start(self, pool, name, ordered, function, args, on_done, on_error):
+        task_id = next(self._ids)
+        task = _Task(task_id, function, args, self._signals)
+        self._tasks[task_id] = (name, task, ordered, time.perf_counter(), on_done, on_error)
+        pool.start(task)
+        return task_id
+
+    @Slot(int, object, object)
+    def _finished(self, task_id, result, error):
+        name, _, ordered, started, on_done, on_error = self._tasks.pop(task_id)
+        if not ordered and self._latest.get(name) != task_id:
+            return  # Superseded by a newer request with the same name
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                sys.excepthook(type(error), error, error.__traceback__)  # Not silently dropped
+        elif on_done is not None:
+            on_done(result)
+        ms = (time.perf_counter() - started) * 1000
+        self.latency.setdefault(name, LatencyStats()).record(ms)
+        self.latencyRecorded.emit(name, ms)
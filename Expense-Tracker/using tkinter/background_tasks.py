@@ -0,0 +1,90 @@
+# Background task runner for the tkinter Expense Tracker
+#
+# Tkinter widgets may only be touched from the thread running mainloop(), so slow work
+# (loading and saving the ledger, computing summaries) is handed to a thread pool and the
+# results are collected by polling with root.after(). Results are then passed to callbacks
+# on the Tk thread.
+#
+# Tasks are submitted under a name. Submitting a new task with the same name supersedes the
+# previous one: it is cancelled if it hasn't started, and its result is dropped if it has.
+# Writes go through submit_ordered() instead, which runs tasks one at a time in submission
+# order and never drops them. The time from submit to delivery is recorded per name.
+# A task that fails without an on_error callback is reported like any other Tk callback error.
+import time  # For measuring latency
+from concurrent.futures import ThreadPoolExecutor  # For running tasks off the Tk thread
+
+from expense_core.expense_latency import LatencyStats  # Shared with the Qt tracker's workers.py
+
+POLL_MS = 20  # How often finished tasks are checked for while any are pending
+
+
+class TaskRunner:
+    """Runs functions on background threads and delivers their results on the Tk thread."""
+
+    def __init__(self, root, max_workers=2):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="expense-task")
+        self._ordered = ThreadPoolExecutor(max_workers=1, thread_name_prefix="expense-writer")  # Keeps writes in order
+        self._pending = {}  # name -> (future, started, on_done, on_error) for the latest task of each name
+        self._ordered_pending = []  # (name, future, started, on_done, on_error) for ordered tasks not yet delivered
+        self._polling = False
+        self.latency = {}  # name -> LatencyStats
+        self.on_latency = None  # Optional callback(name, ms), called after each delivery
+
+    def submit(self, name, function, *args, on_done=None, on_error=None):
+        """Runs function(*args) in the background; on_done(result) or on_error(exception) is called on the Tk thread."""
+        previous = self._pending.pop(name, None)
+        if previous is not None:
+            previous[0].cancel()  # Only succeeds if it hasn't started; otherwise its result is ignored
+        future = self._pool.submit(function, *args)
+        self._pending[name] = (future, time.perf_counter(), on_done, on_error)
+        self._schedule_poll()
+
+    def submit_ordered(self, name, function, *args, on_done=None, on_error=None):
+        """Runs function(*args) on the single writer thread, after every ordered task submitted before it."""
+        future = self._ordered.submit(function, *args)
+        self._ordered_pending.append((name, future, time.perf_counter(), on_done, on_error))
+        self._schedule_poll()
+
+    def latency_report(self):
+        """Returns {name: {"count", "last_ms", "mean_ms", "max_ms"}} for every operation so far."""
+        return {name: stats.as_dict() for name, stats in self.latency.items()}
+
+    def shutdown(self):
+        """Waits for pending writes (so no expense is lost) and stops the threads."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._ordered.shutdown(wait=True)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        """Delivers the results of finished tasks, then polls again if anything is still running."""
+        for name, (future, started, on_done, on_error) in list(self._pending.items()):
+            if future.done():
+                del self._pending[name]
+                self._deliver(name, future, started, on_done, on_error)
+        # Ordered tasks finish in order, so results are delivered from the front of the queue
+        while self._ordered_pending and self._ordered_pending[0][1].done():
+            self._deliver(*self._ordered_pending.pop(0))
+
+        if self._pending or self._ordered_pending:
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self, name, future, started, on_done, on_error):
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+        elif on_done is not None:
+            on_done(future.result())
+        ms = (time.perf_counter() - started) * 1000
+        self.latency.setdefault(name, LatencyStats()).record(ms)
+        if self.on_latency is not None:
+            self.on_latency(name, ms)
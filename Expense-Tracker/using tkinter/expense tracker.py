@@ -1,146 +1,209 @@
 # Importing necessary libraries
+import time # For measuring startup time
+STARTED_AT = time.perf_counter() # Taken before the other imports so they count towards startup time
+import sys # For reading command line flags
+import os # For finding expense_core and instrumentation.py in the folders above this one
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # expense_core
+sys.path.insert(2, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir)) # instrumentation.py
+import instrumentation # Call counts, timings and memory peaks; on with INSTRUMENT=FILE or --instrument[=FILE]
+instrumentation.configure()
+from instrumentation import instrument
 import tkinter as tk  # For GUI application creation
 from tkinter import ttk, messagebox # For tabbed interface and messageboxes
-import json # For reading and writing JSON data (used for saving expenses)
 from datetime import datetime # For handling date and time
-import os # For checking file existence
-import matplotlib.pyplot as plt # For plotting graphs (e.g., Pie chart)
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg # For embedding Matplotlib figures into Tkinter
+from expense_core import CATEGORIES, Ledger, month_date, normalize_expense # Expense logic shared with expense_cli.py
+from expense_chart import PieChart # One reusable pie chart per summary tab (imports matplotlib on first use)
+from background_tasks import TaskRunner # Runs loading, saving and summaries off the UI thread
 
 
 # Constants (Fixed values used throughout the application)
-DATA_FILE = "expenses.json" # The name of the file where expenses are saved
-CATEGORIES = ["Food", "Transportation", "Entertainment", "Other"]  # List of categories for expenses
+DATA_FILE = "expenses.json" # The name of the file where expenses are saved (a .db file uses SQLite instead)
+if "--data" in sys.argv[:-1]:
+    DATA_FILE = sys.argv[sys.argv.index("--data") + 1] # e.g. --data expenses.db
+# JSON: new expenses are appended to expenses.jsonl and folded into DATA_FILE in the background.
+# SQLite: new expenses are inserted into the database, and only its monthly totals are loaded.
+ledger = Ledger(DATA_FILE)
+MEASURE_STARTUP = "--measure-startup" in sys.argv # Prints startup timings and exits once the ledger is loaded (see startup_check.py)
 
 # Functions (Each function is responsible for specific tasks)
-def load_data():
-    """Loads the expense data from the JSON file if it exists. If the file doesn't exist, returns an empty list."""
-    if os.path.exists(DATA_FILE): # Checks if the expenses file exists
-        with open(DATA_FILE, 'r') as file: # Opens the file in read mode
-            return json.load(file) # Loads and returns the data as a list
-    return [] # If the file doesn't exist, returns an empty list
-
-def save_data(expenses):
-    """Saves the given list of expenses into a JSON file."""
-    with open(DATA_FILE, 'w') as file: # Opens the file in write mode
-        json.dump(expenses, file)  # Dumps the expenses list as JSON into the file
+@instrument
+def load_ledger():
+    """Loads the expenses and builds their monthly tables. Runs on a background thread."""
+    return ledger.load()
 
+def start_loading():
+    """Loads the ledger in the background so the window shows up immediately."""
+    loading_bar.start(10) # Animates the progress bar while loading
+    runner.submit("load", load_ledger, on_done=finish_loading, on_error=loading_failed)
+
+def loading_failed(error):
+    """Shows why the ledger could not be loaded."""
+    loading_bar.stop()
+    loading_bar.pack_forget()
+    loading_label.config(text=f"Could not load expenses: {error}")
+
+def finish_loading(result):
+    """Enables the buttons once the ledger is loaded."""
+    loading_bar.stop()
+    loading_bar.pack_forget()
+    loading_label.pack_forget()
+    for button in (add_expense_button, summary_button, monthly_summary_button):
+        button.config(state=tk.NORMAL) # Buttons stay disabled until the ledger is ready
+    if MEASURE_STARTUP:
+        print(f"startup: ledger loaded in {(time.perf_counter() - STARTED_AT) * 1000:.1f} ms ({len(ledger)} expenses)")
+        root.destroy()
+
+def save_failed(error):
+    """Tells the user that an expense could not be written to disk."""
+    messagebox.showerror("Save Error", f"Could not save the expense: {error}")
+
+def summary_failed(error):
+    """Tells the user that a summary could not be computed."""
+    messagebox.showerror("Summary Error", f"Could not compute the summary: {error}")
+
+def show_latency(name, ms):
+    """Shows how long the last background operation took, from click to result."""
+    status_label.config(text=f"Last operation: {name} took {ms:.1f} ms")
+
+def report_window_ready():
+    """Prints how long it took until the window was drawn (only with --measure-startup)."""
+    root.update_idletasks()
+    print(f"startup: window ready in {(time.perf_counter() - STARTED_AT) * 1000:.1f} ms")
+
+@instrument
 def add_expense():
     """Handles adding a new expense by reading input fields and saving the new expense."""
-    try: # Retrieves the input values from the user interface
-        amount = float(amount_entry.get()) # Converts the entered amount to a float
-        description = description_entry.get()# Gets the description of the expense
-        category = category_var.get() # Gets the selected category
-        month = month_entry.get()# Gets the month value
-        year = year_entry.get()# Gets the year value
-        # Checks if all fields are filled
-        if not all([description, category, month, year]):
-            messagebox.showwarning("Input Error", "Please fill all fields.") # Shows a warning if any field is empty
-            return
-        # Validates the month and year as numeric values
-        if not (month.isdigit() and year.isdigit()):
-            messagebox.showerror("Invalid Input", "Please enter numeric values for month and year.") # Error message for invalid input
-            return
-         # Creates a date string in the format "YYYY-MM"
-        date = f"{year}-{month.zfill(2)}" # `zfill(2)` ensures month is always 2 digits
-        # Creates a dictionary to store the expense details
-        expense = {
-            "amount": amount,
-            "description": description,
-            "category": category,
-            "date": date
-        }
-        expenses.append(expense)  # Adds the new expense to the list of expenses
-        save_data(expenses) # Saves the updated list of expenses to the JSON file
-        
-        # Clear input fields after saving the expense
-        amount_entry.delete(0, tk.END) # Clears the amount field
-        description_entry.delete(0, tk.END) # Clears the description field
-        category_var.set(CATEGORIES[0]) # Resets category selection to the first option
-        month_entry.delete(0, tk.END) # Clears the month field
-        year_entry.delete(0, tk.END) # Clears the year field
-        # Shows a success message
-        messagebox.showinfo("Success", "Expense added successfully!")
-    except ValueError:
-        # Error handling for invalid amount input
-        messagebox.showerror("Invalid Input", "Please enter a valid number for amount.")
+    # Retrieves the input values from the user interface
+    amount = amount_entry.get() # Gets the entered amount
+    description = description_entry.get()# Gets the description of the expense
+    category = category_var.get() # Gets the selected category
+    month = month_entry.get()# Gets the month value
+    year = year_entry.get()# Gets the year value
+    # Checks if all fields are filled
+    if not all([amount, description, category, month, year]):
+        messagebox.showwarning("Input Error", "Please fill all fields.") # Shows a warning if any field is empty
+        return
+    try:
+        # Validates the fields and creates a dictionary with the expense details ("YYYY-MM" date),
+        # with the same checks that expense_core/expense_import.py applies to every CSV row
+        expense = normalize_expense(amount, description, category, month_date(month, year))
+    except ValueError as e:
+        messagebox.showerror("Invalid Input", str(e)) # Error message for invalid input
+        return
+    ledger.add_expense(expense, write=False) # Adds the new expense and updates the running totals used by the summary tabs
+    runner.submit_ordered("save", ledger.write, [expense], on_error=save_failed) # Appends just this expense to the journal, off the UI thread
+    
+    # Clear input fields after saving the expense
+    amount_entry.delete(0, tk.END) # Clears the amount field
+    description_entry.delete(0, tk.END) # Clears the description field
+    category_var.set(CATEGORIES[0]) # Resets category selection to the first option
+    month_entry.delete(0, tk.END) # Clears the month field
+    year_entry.delete(0, tk.END) # Clears the year field
+    # Shows a success message
+    messagebox.showinfo("Success", "Expense added successfully!")
 
+@instrument
 def view_summary():
     """Displays a summary of all expenses, including the total and category-wise breakdown"""
-    total_spent = sum(expense["amount"] for expense in expenses)  # Calculates the total expenses
+    # Reads the totals in the background; clicking again before it finishes replaces the request
+    runner.submit("summary", ledger.summary, on_done=show_summary, on_error=summary_failed)
+
+@instrument
+def show_summary(result):
+    """Shows the total and category-wise breakdown computed by view_summary."""
+    total_spent, category_totals = result  # The running total and the total amount for each category
     summary_text = f"Total Expenses: ${total_spent:.2f}\n\nExpenses by Category:\n"
-    # Creates a dictionary to store total amounts for each category
-    category_totals = {}
-    for expense in expenses:
-        category = expense["category"]
-        category_totals[category] = category_totals.get(category, 0) + expense["amount"]
-        # Adds category-wise breakdown to the summary text
-    
+    # Adds category-wise breakdown to the summary text
     for category, amount in category_totals.items():
         summary_text += f"{category}: ${amount:.2f}\n"
     # Updates the summary label with the calculated text
     summary_tab_summary_label.config(text=summary_text)
     
-    # Generate Pie Chart
+    # Update the Pie Chart (skipped if the totals haven't changed since the last click)
     categories = list(category_totals.keys()) # Categories list
     amounts = list(category_totals.values()) # Corresponding amounts
-    fig, ax = plt.subplots(figsize=(6, 5), dpi=100) # Creates a figure and axis for the pie chart
-    ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90) # Plots the pie chart
-    ax.axis('equal') # Ensures the pie chart is circular
-    ax.set_title('Category-wise Expenses') # Sets the title for the chart
-    chart = FigureCanvasTkAgg(fig, master=summary_tab) # Converts the Matplotlib chart to a Tkinter widget
-    chart.draw() # Draws the chart
-    chart.get_tk_widget().grid(row=2, column=0, columnspan=2, padx=10, pady=10) # Places the chart in the UI
+    summary_chart.update(categories, amounts, 'Category-wise Expenses')
 
+@instrument
 def view_monthly_summary():
     month = month_summary_entry.get() # Gets the entered month
     year = year_summary_entry.get()  # Gets the entered year
+    through_month = through_month_entry.get() # Optional end of a range of months
+    through_year = through_year_entry.get()
     
-    if not (month.isdigit() and year.isdigit()):
-        messagebox.showerror("Invalid Input", "Please enter valid numeric values for month and year.")
+    try:
+        month_key = month_date(month, year) # "YYYY-MM"
+        end_key = month_date(through_month, through_year) if (through_month or through_year) else month_key
+    except ValueError as e:
+        messagebox.showerror("Invalid Input", str(e))
         return
-     # Filters the expenses to include only those that match the entered month and year
-    monthly_expenses = [expense for expense in expenses if expense["date"].startswith(f"{year}-{month.zfill(2)}")]
+    if end_key < month_key:
+        messagebox.showerror("Invalid Input", "The end of the range is before its start.")
+        return
+    # Looks up the totals for the entered month (or range of months) in the background
+    runner.submit("monthly_summary", monthly_report, month_key, end_key,
+                  on_done=lambda result: show_monthly_summary(month_key, end_key, result), on_error=summary_failed)
+
+@instrument
+def monthly_report(month_key, end_key):
+    """Reads everything the Monthly Summary tab shows from the prefix-sum tables. Runs on a background thread."""
+    if end_key != month_key:
+        return ledger.range_summary(month_key, end_key), None, None, None # Totals over the whole range
+    # For a single month: the totals, the change from the previous month and the 3 and 12 month averages
+    return (ledger.monthly_summary(month_key), ledger.month_over_month(month_key),
+            ledger.rolling_average(month_key, 3), ledger.rolling_average(month_key, 12))
+
+@instrument
+def show_monthly_summary(month_key, end_key, result):
+    """Shows the monthly total and category-wise breakdown computed by view_monthly_summary."""
+    (monthly_total, category_totals), changes, averages_3, averages_12 = result
+    period = month_key if end_key == month_key else f"{month_key} to {end_key}"
     
-    if not monthly_expenses: # If no expenses match, shows a message
-        monthly_summary_tab_summary_label.config(text="No expenses found for this month.")
+    if not category_totals: # If no expenses match, shows a message
+        monthly_summary_tab_summary_label.config(text=f"No expenses found for {period}.")
         return
-     # Calculates the total and category-wise expenses for the month
-    monthly_total = sum(expense["amount"] for expense in monthly_expenses)
-    summary_text = f"Total Expenses for {year}-{month.zfill(2)}: ${monthly_total:.2f}\n\nExpenses by Category:\n"
+    summary_text = f"Total Expenses for {period}: ${monthly_total:.2f}\n\nExpenses by Category:\n"
     
-    category_totals = {}
-    for expense in monthly_expenses:
-        category = expense["category"]
-        category_totals[category] = category_totals.get(category, 0) + expense["amount"]
-    # Adds category-wise breakdown to the summary text
+    # Adds category-wise breakdown to the summary text, with the change from the previous month
     for category, amount in category_totals.items():
-        summary_text += f"{category}: ${amount:.2f}\n"
+        summary_text += f"{category}: ${amount:.2f}"
+        previous = changes[category][1] if changes else 0
+        if previous:
+            summary_text += f" ({(amount - previous) / previous:+.0%} vs previous month)"
+        summary_text += "\n"
+    # Adds the average spent per month over the last 3 and 12 months
+    if averages_12:
+        summary_text += "\nAverage per Month (last 3 / last 12 months):\n"
+        for category, average in averages_12.items():
+            summary_text += f"{category}: ${averages_3.get(category, 0):.2f} / ${average:.2f}\n"
     # Updates the monthly summary label with the calculated text
     monthly_summary_tab_summary_label.config(text=summary_text)
     
-    # Generate Pie Chart for Monthly Summary
+    # Update the Pie Chart for Monthly Summary
     categories = list(category_totals.keys())
     amounts = list(category_totals.values())
-    fig, ax = plt.subplots(figsize=(6, 5), dpi=100)
-    ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')
-    ax.set_title(f'Monthly Expenses for {year}-{month.zfill(2)}')
-    chart = FigureCanvasTkAgg(fig, master=monthly_summary_tab)
-    chart.draw()
-    chart.get_tk_widget().grid(row=4, column=0, columnspan=2, padx=10, pady=10)
+    monthly_chart.update(categories, amounts, f'Monthly Expenses for {period}')
 
 # Set up the main Tkinter window
 root = tk.Tk()
 root.title("Expense Tracker") # Sets the title of the window
-
-# Load existing data or initialize an empty list
-expenses = load_data() # Loads the expenses from the JSON file
+runner = TaskRunner(root) # Background threads whose results are delivered back on the UI thread
+runner.on_latency = show_latency
 
 # Create Notebook (for tabs)
 notebook = ttk.Notebook(root) # Creates a tabbed interface
 notebook.pack(pady=10, expand=True) # Adds the notebook to the window
 
+# Progress indicator shown while the ledger loads
+loading_label = tk.Label(root, text="Loading expenses...")
+loading_label.pack()
+loading_bar = ttk.Progressbar(root, mode="indeterminate", length=200)
+loading_bar.pack(pady=5)
+
+# Status line showing the latency of the last background operation
+status_label = tk.Label(root, text="", anchor="w")
+status_label.pack(fill="x", side="bottom", padx=10)
+
 # Tab 1: Add Expense
 add_expense_tab = ttk.Frame(notebook)  # Creates a frame for the "Add Expense" tab
 notebook.add(add_expense_tab, text='Add Expense') # Adds the tab to the notebook
@@ -168,19 +231,21 @@ tk.Label(add_expense_tab, text="Year (YYYY):").grid(row=4, column=0, padx=10, pa
 year_entry = tk.Entry(add_expense_tab)
 year_entry.grid(row=4, column=1, padx=10, pady=5)
 
-add_expense_button = tk.Button(add_expense_tab, text="Add Expense", command=add_expense)
+add_expense_button = tk.Button(add_expense_tab, text="Add Expense", command=add_expense, state=tk.DISABLED)
 add_expense_button.grid(row=5, column=0, columnspan=2, padx=10, pady=10)
 
 # Tab 2: Summary
 summary_tab = ttk.Frame(notebook)
 notebook.add(summary_tab, text='View Summary')
 
-summary_button = tk.Button(summary_tab, text="View Summary", command=view_summary)
+summary_button = tk.Button(summary_tab, text="View Summary", command=view_summary, state=tk.DISABLED)
 summary_button.grid(row=0, column=0, columnspan=2, padx=10, pady=10)
 
 summary_tab_summary_label = tk.Label(summary_tab, text="", justify="left", anchor="w")
 summary_tab_summary_label.grid(row=1, column=0, columnspan=2, padx=10, pady=5)
 
+summary_chart = PieChart(summary_tab, row=2) # Created empty; the figure is built on the first click
+
 # Tab 3: Monthly Summary
 monthly_summary_tab = ttk.Frame(notebook)
 notebook.add(monthly_summary_tab, text='Monthly Summary')
@@ -193,11 +258,29 @@ tk.Label(monthly_summary_tab, text="Year (YYYY):").grid(row=1, column=0, padx=10
 year_summary_entry = tk.Entry(monthly_summary_tab)
 year_summary_entry.grid(row=1, column=1, padx=10, pady=5)
 
-monthly_summary_button = tk.Button(monthly_summary_tab, text="View Monthly Summary", command=view_monthly_summary)
-monthly_summary_button.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
+# Optional end month and year, for the totals of a range of months
+tk.Label(monthly_summary_tab, text="Through Month (MM, optional):").grid(row=2, column=0, padx=10, pady=5)
+through_month_entry = tk.Entry(monthly_summary_tab)
+through_month_entry.grid(row=2, column=1, padx=10, pady=5)
+
+tk.Label(monthly_summary_tab, text="Through Year (YYYY, optional):").grid(row=3, column=0, padx=10, pady=5)
+through_year_entry = tk.Entry(monthly_summary_tab)
+through_year_entry.grid(row=3, column=1, padx=10, pady=5)
+
+monthly_summary_button = tk.Button(monthly_summary_tab, text="View Monthly Summary", command=view_monthly_summary, state=tk.DISABLED)
+monthly_summary_button.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
 
 monthly_summary_tab_summary_label = tk.Label(monthly_summary_tab, text="", justify="left", anchor="w")
-monthly_summary_tab_summary_label.grid(row=3, column=0, columnspan=2, padx=10, pady=5)
+monthly_summary_tab_summary_label.grid(row=5, column=0, columnspan=2, padx=10, pady=5)
+
+monthly_chart = PieChart(monthly_summary_tab, row=6)
+
+# Load the ledger in the background once the window is up
+if MEASURE_STARTUP:
+    root.after_idle(report_window_ready)
+start_loading()
 
 # Run the main loop
 root.mainloop()
+runner.shutdown() # Waits for any expense still being written
+ledger.close()
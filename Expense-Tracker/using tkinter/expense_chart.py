@@ -0,0 +1,79 @@
+# Pie chart component for the Expense Tracker summary tabs
+#
+# Each tab owns one PieChart, which creates a single Figure and FigureCanvasTkAgg the first time
+# it is drawn and reuses them afterwards. When the categories are the same as last time, the
+# existing wedges and labels are moved in place instead of re-plotting; when nothing changed
+# at all, the redraw is skipped. Matplotlib is imported on first use to keep startup fast.
+import math  # For placing the labels around the pie
+
+START_ANGLE = 90  # Same start angle as the original charts
+LABEL_DISTANCE = 1.1  # Matplotlib's default distance of the category labels from the centre
+PCT_DISTANCE = 0.6  # Matplotlib's default distance of the percentage labels from the centre
+
+
+class PieChart:
+    """A pie chart embedded in a Tkinter frame that is updated instead of recreated."""
+
+    def __init__(self, master, row, column=0, columnspan=2):
+        self.master = master
+        self.grid_options = dict(row=row, column=column, columnspan=columnspan, padx=10, pady=10)
+        self.figure = None  # Created on the first update
+        self.axes = None
+        self.canvas = None
+        self._wedges = []  # Artists from the last full plot, reused for in-place updates
+        self._labels = []
+        self._pct_texts = []
+        self._last = None  # (labels, values, title) that are currently on screen
+
+    def update(self, labels, values, title):
+        """Shows the given categories and amounts. Returns False if the chart already showed exactly that."""
+        labels = tuple(labels)
+        values = tuple(values)
+        if (labels, values, title) == self._last:
+            return False  # Same aggregates as last time, nothing to redraw
+        if self.figure is None:
+            self._create()
+        if self._last is not None and labels == self._last[0] and self._wedges and sum(values) > 0:
+            self._move_wedges(values)  # Same categories: reuse the existing wedges and texts
+        else:
+            self._plot(labels, values)
+        self.axes.set_title(title)
+        self._last = (labels, values, title)
+        self.canvas.draw_idle()  # Coalesces with any other pending redraw
+        return True
+
+    def _create(self):
+        """Creates the figure and canvas once. Uses matplotlib.figure.Figure, which pyplot does not keep track of."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.figure = Figure(figsize=(6, 5), dpi=100)
+        self.axes = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.master)
+        self.canvas.get_tk_widget().grid(**self.grid_options)
+
+    def _plot(self, labels, values):
+        """Draws the pie from scratch (used when the set of categories changes)."""
+        self.axes.clear()
+        if values and sum(values) > 0:
+            self._wedges, self._labels, self._pct_texts = self.axes.pie(
+                values, labels=labels, autopct='%1.1f%%', startangle=START_ANGLE)
+        else:
+            self._wedges, self._labels, self._pct_texts = [], [], []
+        self.axes.axis('equal')  # Ensures the pie chart is circular
+
+    def _move_wedges(self, values):
+        """Updates the angles of the existing wedges and moves their labels, the same way Axes.pie places them."""
+        total = sum(values)
+        theta1 = START_ANGLE
+        for wedge, label, pct_text, value in zip(self._wedges, self._labels, self._pct_texts, values):
+            fraction = value / total
+            theta2 = theta1 + 360 * fraction
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            middle = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            label.set_position((LABEL_DISTANCE * x, LABEL_DISTANCE * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            pct_text.set_position((PCT_DISTANCE * x, PCT_DISTANCE * y))
+            pct_text.set_text(f"{fraction * 100:.1f}%")
+            theta1 = theta2
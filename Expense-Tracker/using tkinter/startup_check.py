@@ -0,0 +1,71 @@
+# Startup-time check for the tkinter Expense Tracker
+#
+# Runs the tracker as `python -X importtime "expense tracker.py" --measure-startup`. In that mode
+# the tracker prints when its window is ready and when the ledger has loaded, then closes itself.
+# This script reports those timings and the slowest imports, and exits with status 1 if matplotlib
+# is imported during startup or the imports take longer than the budget. Needs a display.
+#
+#   python startup_check.py                  # default budget of 300 ms for imports
+#   python startup_check.py --budget-ms 150
+import argparse  # For command line options
+import os  # For locating the tracker script
+import subprocess  # For running the tracker in a fresh interpreter
+import sys  # For the current Python executable and exit status
+
+TRACKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "expense tracker.py")
+DEFERRED_MODULES = ["matplotlib"]  # Modules that must not be imported before a chart is requested
+
+
+def parse_importtime(stderr):
+    """Parses `-X importtime` output into a list of (module, self_us, cumulative_us, depth)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # 0 for top-level imports, +1 per nesting level
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the tkinter Expense Tracker.")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Maximum total import time in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", TRACKER, "--measure-startup"],
+        capture_output=True, text=True, timeout=120,
+    )
+    if result.returncode != 0:
+        print("The tracker did not start:")
+        print(result.stderr[-2000:])
+        sys.exit(1)
+
+    imports = parse_importtime(result.stderr)
+    # The cumulative time of the top-level imports already includes everything they import
+    total_ms = sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+    print(result.stdout.strip())
+    print(f"startup: imports took {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("Slowest top-level imports:")
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: entry[2], reverse=True)
+    for name, _, cumulative, _ in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    loaded_early = sorted({name for name, _, _, _ in imports
+                           if any(name == module or name.startswith(module + ".") for module in DEFERRED_MODULES)})
+    if loaded_early:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(loaded_early[:5])}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
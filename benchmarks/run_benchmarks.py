@@ -0,0 +1,366 @@
+# ================================================
+# Benchmark Suite
+# ================================================
+#
+# Times the core logic of the programs in this repository on synthetic inputs of several sizes,
+# without opening any tkinter or Qt windows:
+#   - word counter:    count_words, streaming and memory-mapped counting, word frequencies
+#   - expense tracker: the view_summary / view_monthly_summary aggregations (full rescan,
+#                      prefix-sum analytics and, if NumPy is installed, the columnar store) and
+#                      the sharded multi-user report, with and without its cache
+#   - quiz game:       run_quiz scoring over generated question banks
+#
+# Each benchmark reports its best time over several repeats, throughput (items per second, or
+# calls per second for lookups whose cost doesn't depend on the input size) and peak memory (measured separately with tracemalloc). Results are written as JSON.
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                                  # print results
+#   python benchmarks/run_benchmarks.py --output results.json            # save results
+#   python benchmarks/run_benchmarks.py --baseline results.json          # fail on regressions
+#   python benchmarks/run_benchmarks.py --max-rows 10000000 --only expense
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)  # For the helper modules the scripts import (e.g. quiz_engine)
+EXPENSE_TRACKER_DIR = os.path.join(REPO_ROOT, "Expense-Tracker")  # Holds the expense_core package
+CATEGORIES = ["Food", "Transportation", "Entertainment", "Other"]
+VOCABULARY = ["the", "of", "and", "to", "in", "expense", "tracker", "python", "quiz", "word",
+              "counter", "data", "summary", "monthly", "category", "amount", "é", "naïve", "日本"]
+
+
+### Loading the Programs ###
+def load_script(name, path):
+    """
+    Imports a script by its file path (the scripts have spaces in their names, so
+    they can't be imported normally). Returns the module.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # Needed so process pools can pickle its functions
+    spec.loader.exec_module(module)
+    return module
+
+
+def has_numpy():
+    """
+    Returns True if NumPy is installed (the columnar and memory-mapped paths need it).
+    """
+    return importlib.util.find_spec("numpy") is not None
+
+
+### Synthetic Inputs ###
+def make_text(words, rng):
+    """
+    Generates a text of `words` words with a skewed word distribution and mixed whitespace.
+    """
+    separators = [" ", " ", " ", "  ", "\n", "\t"]
+    return "".join(rng.choice(VOCABULARY) + rng.choice(separators) for _ in range(words))
+
+
+def make_ledger(rows, rng):
+    """
+    Generates `rows` expenses in the tracker's JSON format spread over ten years.
+    """
+    return [
+        {
+            "amount": round(rng.uniform(1, 500), 2),
+            "description": f"item {rng.randint(1, 1000)}",
+            "category": rng.choice(CATEGORIES),
+            "date": f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}",
+        }
+        for _ in range(rows)
+    ]
+
+
+def make_question_bank(count, rng):
+    """
+    Generates `count` multiple-choice questions in the quiz game's format.
+    """
+    bank = []
+    for i in range(count):
+        options = [f"option {i}-{j}" for j in range(4)]
+        bank.append({"question": f"Question number {i}?", "options": options, "answer": rng.choice(options)})
+    return bank
+
+
+### Measuring ###
+def measure(name, scale, items, function, repeats, min_time=0.1, unit="items"):
+    """
+    Times `function` `repeats` times and runs it once more under tracemalloc.
+    Fast functions are called in a loop until each timed run takes at least `min_time`
+    seconds, which keeps timer noise out of the results.
+    Returns a result dict with the best time per call, throughput (`items` per call, counted
+    in `unit`s) and peak memory.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        best = min(best, (time.perf_counter() - start) / loops)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "name": name,
+        "scale": scale,
+        "seconds": best,
+        "items_per_sec": items / best if best > 0 else float("inf"),
+        "unit": unit,
+        "peak_bytes": peak,
+    }
+    print(f"{name:<40} {scale:>10}  {best * 1000:10.2f} ms  {result['items_per_sec']:14,.0f} {unit + '/s':<7}"
+          f"  {peak / 1024:10.0f} KiB", file=sys.stderr)
+    return result
+
+
+def scales(maximum, start=1000):
+    """
+    Returns the powers of ten from `start` up to `maximum`.
+    """
+    values = []
+    value = start
+    while value <= maximum:
+        values.append(value)
+        value *= 10
+    return values
+
+
+### Benchmarks ###
+def bench_word_counter(args, rng):
+    """
+    Benchmarks count_words, the streaming and memory-mapped paths, and word frequencies.
+    """
+    counter = load_script("word_counter", os.path.join(REPO_ROOT, "word counter.py"))
+    results = []
+    for words in scales(args.max_words, start=10000):
+        text = make_text(words, rng)
+        ascii_text = text.replace("é", "e").replace("ï", "i").replace("日本", "ri")
+        results.append(measure("word_counter.count_words", words, words,
+                               lambda: counter.count_words(text), args.repeats))
+        results.append(measure("word_counter.count_words_in_stream", words, words,
+                               lambda: counter.count_words_in_stream(io.StringIO(text)), args.repeats))
+        results.append(measure("word_counter.word_frequencies", words, words,
+                               lambda: counter.WordFrequencies().add_text(text), args.repeats))
+        if has_numpy():
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="ascii") as file:
+                file.write(ascii_text)
+            try:
+                results.append(measure("word_counter.count_words_mmap", words, words,
+                                       lambda: counter.count_words_mmap(file.name), args.repeats))
+            finally:
+                os.remove(file.name)
+    return results
+
+
+def rescan_summary(expenses, month=None):
+    """
+    The aggregation the summary tabs originally did on every click: a full scan of the ledger.
+    """
+    category_totals = {}
+    total = 0
+    for expense in expenses:
+        if month is not None and not expense["date"].startswith(month):
+            continue
+        total += expense["amount"]
+        category_totals[expense["category"]] = category_totals.get(expense["category"], 0) + expense["amount"]
+    return total, category_totals
+
+
+def bench_expense_tracker(args, rng):
+    """
+    Benchmarks the view_summary / view_monthly_summary aggregations at several ledger sizes.
+    """
+    sys.path.insert(0, EXPENSE_TRACKER_DIR)
+    from expense_core.expense_analytics import ExpenseAnalytics
+    results = []
+    for rows in scales(args.max_rows):
+        ledger = make_ledger(rows, rng)
+        month = ledger[0]["date"]
+        results.append(measure("expense.rescan_summary", rows, rows,
+                               lambda: rescan_summary(ledger), args.repeats))
+        results.append(measure("expense.rescan_monthly_summary", rows, rows,
+                               lambda: rescan_summary(ledger, month), args.repeats))
+        results.append(measure("expense.analytics_build", rows, rows,
+                               lambda: ExpenseAnalytics(ledger), args.repeats))
+        analytics = ExpenseAnalytics(ledger)
+        # Table lookups: their cost depends on the number of categories, not rows, so they are counted in calls
+        results.append(measure("expense.analytics_summary", rows, 2,
+                               lambda: (analytics.summary(), analytics.summary(month)), args.repeats, unit="calls"))
+        first, last = analytics.months()[0], analytics.months()[-1]
+        results.append(measure("expense.analytics_range", rows, 2,
+                               lambda: (analytics.range_summary(first, last), analytics.rolling_average(last, 12)),
+                               args.repeats, unit="calls"))
+        if has_numpy():
+            from expense_core.expense_columns import ExpenseColumns
+            columns = ExpenseColumns.from_records(ledger)
+            results.append(measure("expense.columns_summary", rows, rows,
+                                   lambda: (columns.total(), columns.category_totals(),
+                                            columns.total(month), columns.category_totals(month)), args.repeats))
+        results += bench_shard_report(ledger, rows, args)
+    return results
+
+
+def bench_shard_report(ledger, rows, args):
+    """
+    Benchmarks ShardedLedger.report over the ledger split across ten users: every shard
+    re-read (no cache) and every shard taken from the cache.
+    """
+    import shutil
+    from expense_core.expense_shards import ShardedLedger
+    root = tempfile.mkdtemp(prefix="expense-shards-")
+    try:
+        shards = ShardedLedger(root)
+        by_user = {}
+        for number, expense in enumerate(ledger):
+            by_user.setdefault(f"user{number % 10}", []).append(expense)
+        for user, expenses in by_user.items():
+            shards.add_expenses(user, expenses)
+
+        def cold_report():
+            if os.path.exists(shards.cache_path):
+                os.remove(shards.cache_path)
+            return shards.report()
+
+        results = [measure("expense.shards_report_cold", rows, rows, cold_report, args.repeats)]
+        shards.report()
+        results.append(measure("expense.shards_report_cached", rows, rows, shards.report, args.repeats))
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_quiz(args, rng):
+    """
+    Benchmarks run_quiz scoring with generated question banks and scripted answers,
+    and bulk grading of many answer sheets with the quiz engine.
+    """
+    from quiz_engine import Quiz
+    quiz = load_script("quiz_game", os.path.join(REPO_ROOT, "simple quiz game.py"))
+    quiz.print = lambda *args, **kwargs: None  # Silences the quiz output (module globals shadow builtins)
+    results = []
+    for count in scales(args.max_questions, start=100):
+        bank = make_question_bank(count, rng)
+        answers = [str(rng.randint(1, 4)) for _ in range(count)]
+
+        def play():
+            quiz.questions = bank
+            replies = iter(answers)
+            quiz.input = lambda prompt="": next(replies)
+            quiz.run_quiz()
+
+        results.append(measure("quiz.run_quiz", count, count, play, args.repeats))
+
+        engine = Quiz(bank)
+        sheets = [[rng.randrange(4) for _ in range(count)] for _ in range(100)]
+        results.append(measure("quiz.grade_batch_100_sheets", count, count * len(sheets),
+                               lambda: engine.grade_batch(sheets), args.repeats))
+    return results
+
+
+BENCHMARKS = {
+    "words": bench_word_counter,
+    "expense": bench_expense_tracker,
+    "quiz": bench_quiz,
+}
+
+
+### Regression Check ###
+def find_regressions(results, baseline, threshold):
+    """
+    Compares results with a baseline run. Returns a list of messages for every benchmark
+    whose throughput dropped, or whose peak memory grew, by more than `threshold`.
+    """
+    previous = {(entry["name"], entry["scale"]): entry for entry in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["name"], result["scale"]))
+        if old is None:
+            continue
+        if result["items_per_sec"] < old["items_per_sec"] * (1 - threshold):
+            regressions.append(f"{result['name']} @ {result['scale']}: throughput "
+                               f"{result['items_per_sec']:,.0f}/s vs {old['items_per_sec']:,.0f}/s")
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + threshold) + 64 * 1024:
+            regressions.append(f"{result['name']} @ {result['scale']}: peak memory "
+                               f"{result['peak_bytes']:,} B vs {old['peak_bytes']:,} B")
+    return regressions
+
+
+def parse_arguments(argv=None):
+    """
+    Reads the command line options.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the word counter, expense aggregations and quiz scoring.")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append",
+                        help="run only these benchmark groups (can be repeated)")
+    parser.add_argument("--max-words", type=int, default=1_000_000, help="largest text corpus, in words")
+    parser.add_argument("--max-rows", type=int, default=100_000,
+                        help="largest ledger, in rows (up to 10000000)")
+    parser.add_argument("--max-questions", type=int, default=10_000, help="largest question bank")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per benchmark; the best is kept")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the synthetic inputs")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed throughput drop / peak memory growth before failing (default: 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Runs the selected benchmarks, writes the results and checks for regressions.
+    Returns the exit status (1 if something regressed).
+    """
+    args = parse_arguments(argv)
+    rng = random.Random(args.seed)
+    results = []
+    for group in args.only or sorted(BENCHMARKS):
+        results.extend(BENCHMARKS[group](args, rng))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION: {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
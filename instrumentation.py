@@ -0,0 +1,233 @@
+# ================================================
+# Instrumentation
+# ================================================
+#
+# Records how often the hot paths of the programs in this repository run, how long they take
+# and how much memory they allocate, so a real session can be examined afterwards.
+#
+# Switched off unless asked for, either with an environment variable or a flag:
+#   INSTRUMENT=stats.json python "word counter.py" big.txt
+#   python "simple quiz game.py" --instrument=stats.json
+#   python "simple quiz game.py" --instrument          # writes instrumentation.json
+#   python "simple quiz game.py" --instrument=quiz.prof  # also a cProfile stats file
+# When the output file ends in .prof or .pstats the whole session is profiled with cProfile and
+# saved there (open it with `python -m pstats quiz.prof`); the per-function numbers below are
+# then written next to it with ".json" added.
+#
+# For every instrumented function (or `with span(name):` block) the JSON file has the call count,
+# total / mean / min / max milliseconds, a latency histogram and the peak memory allocated
+# during a call (from tracemalloc; set INSTRUMENT_MEMORY=0 to skip it, as tracing slows
+# Python down).
+#
+# Memory peaks of calls that run at the same time on different threads are not told apart,
+# because tracemalloc keeps a single peak for the whole process.
+#
+# When instrumentation is off, @instrument returns the function unchanged and span() returns
+# a shared no-op context manager, so the cost is close to zero. configure() must therefore run
+# before the instrumented functions are defined, i.e. right after importing this module.
+import atexit
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_OUTPUT = "instrumentation.json"
+PROFILE_SUFFIXES = (".prof", ".pstats")
+# Upper bounds (in milliseconds) of the latency histogram buckets; the last bucket is everything slower
+HISTOGRAM_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000]
+_OWNER_VARIABLE = "INSTRUMENT_OWNER_PID"  # Keeps child processes (which inherit INSTRUMENT) from writing the file too
+
+enabled = False
+output_path = None
+_trace_memory = False
+_profiler = None
+_stats = {}  # name -> CallStats
+_stats_lock = threading.Lock()
+_memory_frames = threading.local()  # Per-thread stack of [start bytes, peak bytes] for nested calls
+
+
+class CallStats:
+    """Call count, latency and peak memory of one instrumented function or block."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.peak_bytes = 0
+
+    def record(self, ms, peak_bytes):
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, ms)] += 1
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "histogram": {label: calls for label, calls in zip(labels, self.histogram) if calls},
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+### Switching It On ###
+def configure(argv=None):
+    """
+    Turns instrumentation on if INSTRUMENT is set or `argv` (default sys.argv) has --instrument[=FILE].
+    The flag is removed from `argv`, so argument parsers that run later don't see it.
+    Returns True if instrumentation is on.
+    """
+    argv = sys.argv if argv is None else argv
+    path = os.environ.get("INSTRUMENT") or None
+    for position, argument in enumerate(argv[1:], start=1):
+        if argument == "--instrument" or argument.startswith("--instrument="):
+            path = argument.partition("=")[2] or DEFAULT_OUTPUT
+            del argv[position]
+            break
+    if path is None or enabled:
+        return enabled
+    owner = os.environ.setdefault(_OWNER_VARIABLE, str(os.getpid()))
+    if owner != str(os.getpid()):
+        return False  # A worker process started by an instrumented program
+    enable(DEFAULT_OUTPUT if path == "1" else path, trace_memory=os.environ.get("INSTRUMENT_MEMORY") != "0")
+    return True
+
+
+def enable(path=DEFAULT_OUTPUT, trace_memory=True):
+    """Turns instrumentation on and writes the results to `path` when the program exits."""
+    global enabled, output_path, _trace_memory, _profiler
+    enabled = True
+    output_path = path
+    _trace_memory = trace_memory
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if output_path.endswith(PROFILE_SUFFIXES):
+        import cProfile
+        _profiler = cProfile.Profile()  # Profiles the main thread, where the UI and the scripts run
+        _profiler.enable()
+    atexit.register(dump)
+
+
+### Measuring ###
+def instrument(function_or_name=None):
+    """
+    Decorator that records every call of the function. Use as @instrument or @instrument("name");
+    the name defaults to the function's module and qualified name.
+    Returns the function unchanged when instrumentation is off.
+    """
+    def decorate(function):
+        if not enabled:
+            return function
+        name = function_or_name if isinstance(function_or_name, str) else f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    if callable(function_or_name):
+        return decorate(function_or_name)
+    return decorate
+
+
+class _NullSpan:
+    """What span() returns when instrumentation is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager that records the time (and peak memory) of a block under `name`."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+class _Span:
+    __slots__ = ("name", "started", "frame")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if _trace_memory:
+            self.frame = _push_memory_frame()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        ms = (time.perf_counter() - self.started) * 1000
+        peak_bytes = _pop_memory_frame(self.frame) if _trace_memory else 0
+        with _stats_lock:
+            stats = _stats.get(self.name)
+            if stats is None:
+                stats = _stats[self.name] = CallStats()
+            stats.record(ms, peak_bytes)
+        return False
+
+
+def _push_memory_frame():
+    """Starts measuring the peak for a call. tracemalloc has one peak for the whole process, so before
+    resetting it the peak so far is credited to every call that is still running (nested calls)."""
+    import tracemalloc
+    stack = getattr(_memory_frames, "stack", None)
+    if stack is None:
+        stack = _memory_frames.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in stack:
+        frame[1] = max(frame[1], peak)
+    tracemalloc.reset_peak()
+    frame = [current, current]
+    stack.append(frame)
+    return frame
+
+
+def _pop_memory_frame(frame):
+    """Returns the bytes allocated at the peak of a call, on top of what was in use when it started."""
+    import tracemalloc
+    stack = _memory_frames.stack
+    _, peak = tracemalloc.get_traced_memory()
+    frame[1] = max(frame[1], peak)
+    stack.remove(frame)
+    if stack:
+        stack[-1][1] = max(stack[-1][1], frame[1])
+    return frame[1] - frame[0]
+
+
+### Results ###
+def report():
+    """Returns {name: stats dict} for everything recorded so far."""
+    with _stats_lock:
+        return {name: stats.as_dict() for name, stats in sorted(_stats.items())}
+
+
+def dump(path=None):
+    """Writes the results to `path` (default: the configured output). Called automatically at exit."""
+    path = path or output_path
+    if path is None:
+        return
+    if _profiler is not None and path.endswith(PROFILE_SUFFIXES):
+        _profiler.disable()
+        _profiler.dump_stats(path)
+        path += ".json"
+    with open(path, "w") as file:
+        json.dump({"pid": os.getpid(), "argv": sys.argv, "functions": report()}, file, indent=2)
+    print(f"Instrumentation written to {path}", file=sys.stderr)
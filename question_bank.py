@@ -0,0 +1,269 @@
+# ================================================
+# Question Bank
+# ================================================
+#
+# Loads quiz questions from external files instead of the list in "simple quiz game.py",
+# without reading whole banks into memory:
+#   - JSON-lines (.jsonl): one question per line. Opening the bank scans the file once,
+#     checks every question and keeps only each line's byte offset, answer index, topic and
+#     difficulty; questions are read back from disk when they are picked.
+#   - SQLite (.db / .sqlite / .sqlite3): a `questions` table indexed on (topic, difficulty),
+#     opened read-only (only the converter below creates one).
+#
+# Each line / row looks like:
+#   {"question": "...", "options": ["a", "b", "c"], "answer": "b", "topic": "python", "difficulty": "easy"}
+# Questions come back in the game's format with an extra "answer_index" (the position of the
+# answer in "options"), so the quiz engine grades them with an integer comparison.
+#
+# Convert a JSON-lines bank to SQLite with:  python question_bank.py bank.jsonl bank.db
+
+import bisect
+import errno
+import json
+import os
+import random
+import sqlite3
+import sys
+from array import array
+from urllib.request import pathname2url
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def prepare_question(question):
+    """
+    Adds "answer_index" to a question dict (if it isn't there already) and returns it.
+    Raises ValueError if the answer is not one of the options.
+    """
+    if "answer_index" not in question:
+        try:
+            question["answer_index"] = question["options"].index(question["answer"])
+        except ValueError:
+            raise ValueError(f"the answer {question['answer']!r} is not one of the options") from None
+    return question
+
+
+class JsonlQuestionBank:
+    """
+    A JSON-lines question bank indexed by (topic, difficulty). Only the byte offset and answer
+    index of each question are kept in memory; the question itself is read from the file when
+    it is needed. Raises ValueError (with the line number) if a question is malformed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = array("q")  # question number -> byte offset of its line
+        self.answer_indexes = array("h")  # question number -> position of the answer in its options
+        self.groups = {}  # (topic, difficulty) -> array of question numbers
+        with open(path, "rb") as file:
+            offset = 0
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        entry = json.loads(line)
+                        answer_index = prepare_question(entry)["answer_index"]
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        message = f"missing {e}" if isinstance(e, KeyError) else e
+                        raise ValueError(f"{path}, line {line_number}: {message}") from None
+                    key = (entry.get("topic"), _difficulty_key(entry.get("difficulty")))
+                    self.groups.setdefault(key, array("l")).append(len(self.offsets))
+                    self.offsets.append(offset)
+                    self.answer_indexes.append(answer_index)
+                offset += len(line)
+        self._file = open(path, "rb")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def topics(self):
+        """
+        Returns the sorted list of topics in the bank.
+        """
+        return sorted({topic for topic, _ in self.groups if topic is not None})
+
+    def get(self, number):
+        """
+        Reads question `number` (0-based) from the file.
+        """
+        self._file.seek(self.offsets[number])
+        question = json.loads(self._file.readline())
+        question["answer_index"] = self.answer_indexes[number]  # Checked when the bank was opened
+        return question
+
+    def sample(self, count, topic=None, difficulty=None, rng=random):
+        """
+        Picks `count` different questions at random, optionally only from one topic and/or difficulty.
+        Returns them as a list of question dicts (fewer if the bank doesn't have enough).
+        """
+        matching = [numbers for (group_topic, group_difficulty), numbers in self.groups.items()
+                    if (topic is None or group_topic == topic)
+                    and (difficulty is None or group_difficulty == _difficulty_key(difficulty))]
+        # Sample positions in the matching groups laid end to end, without concatenating them
+        ends = []
+        total = 0
+        for numbers in matching:
+            total += len(numbers)
+            ends.append(total)
+        picks = rng.sample(range(total), min(count, total))
+        questions = []
+        for pick in picks:
+            group = bisect.bisect_right(ends, pick)
+            start = ends[group - 1] if group else 0
+            questions.append(self.get(matching[group][pick - start]))
+        return questions
+
+    def close(self):
+        self._file.close()
+
+
+class SqliteQuestionBank:
+    """
+    A question bank stored in SQLite. Sampling only reads question ids from the
+    (topic, difficulty) index and then fetches the picked rows.
+
+    Existing banks are opened read-only, so a mistyped name can't create an empty bank;
+    pass writable=True to add questions (convert_jsonl_to_sqlite creates the tables).
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        if writable:
+            self.connection = sqlite3.connect(path)
+            return
+        if not os.path.exists(path):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        self.connection = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            self.connection.execute("SELECT id FROM questions LIMIT 1")
+        except sqlite3.DatabaseError as e:
+            self.connection.close()
+            raise ValueError(f"{path} is not a question bank ({e})") from None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def topics(self):
+        """
+        Returns the sorted list of topics in the bank.
+        """
+        rows = self.connection.execute("SELECT DISTINCT topic FROM questions WHERE topic IS NOT NULL ORDER BY topic")
+        return [topic for (topic,) in rows]
+
+    def sample(self, count, topic=None, difficulty=None, rng=random):
+        """
+        Picks `count` different questions at random, optionally only from one topic and/or difficulty.
+        Returns them as a list of question dicts (fewer if the bank doesn't have enough).
+        """
+        conditions, parameters = [], []
+        if topic is not None:
+            conditions.append("topic = ?")
+            parameters.append(topic)
+        if difficulty is not None:
+            conditions.append("difficulty = ?")
+            parameters.append(_difficulty_key(difficulty))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        ids = array("q", (row[0] for row in self.connection.execute(f"SELECT id FROM questions{where}", parameters)))
+        picks = rng.sample(range(len(ids)), min(count, len(ids)))
+        chosen = [ids[pick] for pick in picks]
+        rows = {}
+        for start in range(0, len(chosen), 500):  # Stays under SQLite's limit on query parameters
+            batch = chosen[start:start + 500]
+            query = ("SELECT id, question, options, answer_index, topic, difficulty FROM questions "
+                     f"WHERE id IN ({','.join('?' * len(batch))})")
+            for row in self.connection.execute(query, batch):
+                rows[row[0]] = row
+        return [_row_to_question(rows[question_id]) for question_id in chosen]
+
+    def add_questions(self, questions):
+        """
+        Inserts question dicts in a single transaction.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO questions (question, options, answer_index, topic, difficulty) VALUES (?, ?, ?, ?, ?)",
+                ((question["question"], json.dumps(question["options"]), prepare_question(question)["answer_index"],
+                  question.get("topic"), _difficulty_key(question.get("difficulty"))) for question in questions))
+
+    def close(self):
+        self.connection.close()
+
+
+def create_tables(connection):
+    """
+    Creates the questions table and its (topic, difficulty) index if they don't exist.
+    """
+    with connection:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                answer_index INTEGER NOT NULL,
+                topic TEXT,
+                difficulty TEXT
+            )""")
+        connection.execute("CREATE INDEX IF NOT EXISTS questions_topic_difficulty ON questions (topic, difficulty)")
+
+
+def _row_to_question(row):
+    """
+    Turns a questions table row into a question dict in the game's format.
+    """
+    _, text, options, answer_index, topic, difficulty = row
+    options = json.loads(options)
+    return {"question": text, "options": options, "answer": options[answer_index],
+            "answer_index": answer_index, "topic": topic, "difficulty": difficulty}
+
+
+def _difficulty_key(difficulty):
+    """
+    Stores difficulties as text so 2 and "2" are the same level.
+    """
+    return None if difficulty is None else str(difficulty)
+
+
+def open_question_bank(path):
+    """
+    Opens a question bank, choosing the format from the file extension.
+    """
+    if path.endswith(SQLITE_SUFFIXES):
+        return SqliteQuestionBank(path)
+    return JsonlQuestionBank(path)
+
+
+def convert_jsonl_to_sqlite(jsonl_path, db_path, batch_size=10000):
+    """
+    Copies a JSON-lines bank into an SQLite bank, inserting `batch_size` questions per transaction.
+    Returns the number of questions copied.
+    """
+    with open(jsonl_path, "r", encoding="utf-8") as file:  # Opened first, so a missing file creates no database
+        bank = SqliteQuestionBank(db_path, writable=True)
+        create_tables(bank.connection)
+        copied = 0
+        batch = []
+        for line in file:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                bank.add_questions(batch)
+                copied += len(batch)
+                batch = []
+        bank.add_questions(batch)
+        copied += len(batch)
+        bank.close()
+    return copied
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or not sys.argv[2].endswith(SQLITE_SUFFIXES):
+        print("Usage: python question_bank.py BANK.jsonl BANK.db")
+        sys.exit(2)
+    try:
+        copied = convert_jsonl_to_sqlite(sys.argv[1], sys.argv[2])
+    except OSError as e:
+        print(f"Error: could not read {sys.argv[1]}: {e.strerror}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Copied {copied} questions to {sys.argv[2]}.")
@@ -0,0 +1,160 @@
+# ================================================
+# Quiz Engine
+# ================================================
+#
+# Scoring for the quiz game, kept separate from input() / print() so the same
+# questions can be graded for many players at once:
+#   - Quiz         the questions, with the index of each correct option precomputed
+#   - QuizSession  one player's progress, stored compactly (__slots__ + an array of answers)
+#   - grade_batch  scores many submitted answer sheets in one call
+#   - play_sessions runs many sessions concurrently from a single asyncio event loop
+#
+# Answers are 0-based option indexes; NO_ANSWER marks a question that hasn't been answered.
+# Run this file to simulate thousands of players.
+
+import asyncio
+import random
+import time
+from array import array
+
+NO_ANSWER = -1
+
+
+### Questions ###
+class Quiz:
+    """
+    A list of questions in the game's format ({"question", "options", "answer"}),
+    with the correct option of each one stored as an index so grading is an integer comparison.
+    """
+    __slots__ = ("questions", "answer_indexes")
+
+    def __init__(self, questions):
+        self.questions = questions
+        # Questions from a question bank already carry "answer_index"; the built-in ones are looked up once here
+        self.answer_indexes = array("h", [question["answer_index"] if "answer_index" in question
+                                          else question["options"].index(question["answer"])
+                                          for question in questions])
+
+    def __len__(self):
+        return len(self.questions)
+
+    def grade(self, answers):
+        """
+        Returns the number of correct answers in one answer sheet (a sequence of option indexes).
+        """
+        return sum(1 for given, correct in zip(answers, self.answer_indexes) if given == correct)
+
+    def grade_batch(self, answer_sheets):
+        """
+        Grades many answer sheets at once. Returns a list with the score of each sheet.
+        Uses NumPy to compare all the sheets in one go when it is installed.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return [self.grade(answers) for answers in answer_sheets]
+        answer_sheets = list(answer_sheets)
+        if any(len(answers) != len(self) for answers in answer_sheets):
+            return [self.grade(answers) for answers in answer_sheets]  # Ragged or partial sheets
+        try:
+            # int64, so a huge option index can't wrap around onto a correct one
+            sheets = np.asarray(answer_sheets, dtype=np.int64).reshape(len(answer_sheets), len(self))
+        except (ValueError, OverflowError, TypeError):
+            return [self.grade(answers) for answers in answer_sheets]  # e.g. an index too large for int64
+        correct = np.frombuffer(self.answer_indexes, dtype=np.int16)
+        return (sheets == correct).sum(axis=1).tolist()
+
+
+### Sessions ###
+class QuizSession:
+    """
+    One player's way through a Quiz: which question they are on, what they answered and their score.
+    """
+    __slots__ = ("quiz", "answers", "position", "score")
+
+    def __init__(self, quiz):
+        self.quiz = quiz
+        self.answers = array("h", [NO_ANSWER]) * len(quiz)
+        self.position = 0  # Index of the next question to answer
+        self.score = 0
+
+    @property
+    def finished(self):
+        return self.position >= len(self.quiz)
+
+    def current_question(self):
+        """
+        Returns the question dict the player has to answer next.
+        """
+        return self.quiz.questions[self.position]
+
+    def answer(self, option_index):
+        """
+        Records the player's answer to the current question and moves on.
+        Returns True if the answer was correct.
+        """
+        correct = option_index == self.quiz.answer_indexes[self.position]
+        self.answers[self.position] = option_index
+        self.position += 1
+        if correct:
+            self.score += 1
+        return correct
+
+    def selected_options(self):
+        """
+        Returns the text of the option the player picked for each answered question.
+        """
+        return [question["options"][index] for question, index in zip(self.quiz.questions, self.answers)
+                if index != NO_ANSWER]
+
+
+### Serving Many Players ###
+async def play_session(session, ask):
+    """
+    Plays one session to the end. `ask` is an async function that receives
+    (question, question_number) and returns the chosen 0-based option index.
+    Returns the final score.
+    """
+    while not session.finished:
+        option_index = await ask(session.current_question(), session.position + 1)
+        session.answer(option_index)
+    return session.score
+
+
+async def play_sessions(quiz, askers, max_concurrent=1000):
+    """
+    Runs one session per `ask` function concurrently on the current event loop,
+    with at most `max_concurrent` sessions active at a time.
+    Returns the finished sessions in the same order as `askers`.
+    """
+    limit = asyncio.Semaphore(max_concurrent)
+
+    async def run(ask):
+        async with limit:
+            session = QuizSession(quiz)
+            await play_session(session, ask)
+            return session
+
+    return await asyncio.gather(*(run(ask) for ask in askers))
+
+
+if __name__ == "__main__":
+    # Simulation: many players answering at random, served from one event loop
+    from importlib.util import module_from_spec, spec_from_file_location
+    import os
+    spec = spec_from_file_location("quiz_game", os.path.join(os.path.dirname(os.path.abspath(__file__)), "simple quiz game.py"))
+    quiz_game = module_from_spec(spec)
+    spec.loader.exec_module(quiz_game)
+    quiz = Quiz(quiz_game.questions)
+
+    async def random_player(question, number):
+        await asyncio.sleep(0)  # Stands in for waiting on a real player's reply
+        return random.randrange(len(question["options"]))
+
+    players = 10000
+    start = time.perf_counter()
+    sessions = asyncio.run(play_sessions(quiz, [random_player] * players))
+    elapsed = time.perf_counter() - start
+    scores = [session.score for session in sessions]
+    assert scores == quiz.grade_batch([session.answers for session in sessions])
+    print(f"Served {players} sessions in {elapsed:.2f} s; average score {sum(scores) / players:.2f}/{len(quiz)}")
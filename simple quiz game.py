@@ -1,3 +1,11 @@
+import argparse
+import sys
+import instrumentation
+instrumentation.configure()  # On with INSTRUMENT=FILE or --instrument[=FILE]; see instrumentation.py
+from instrumentation import instrument
+from quiz_engine import Quiz, QuizSession
+from question_bank import open_question_bank
+
 questions = [
     {
         "question": "What is the output of print(2 * 3)?",
@@ -26,10 +34,11 @@ questions = [
     }
 ]
 
+@instrument
 def run_quiz():
-    score = 0
+    # Scoring is done by the quiz engine; this function only handles input and output
+    session = QuizSession(Quiz(questions))
     total_questions = len(questions)
-    user_answers = []
 
     i = 0
     for q in questions:
@@ -46,17 +55,14 @@ def run_quiz():
         while not answer.isdigit() or int(answer) < 1 or int(answer) > len(q['options']):
             answer = input("Invalid input. Please enter a valid option number: ")
 
-        selected_option = q['options'][int(answer) - 1]
-        user_answers.append(selected_option)
-
-        if selected_option == q['answer']:
+        if session.answer(int(answer) - 1):
             print("Correct!\n")
-            score += 1
         else:
             print(f"Incorrect! The correct answer was: {q['answer']}\n")
 
-    display_results(score, total_questions, user_answers)
+    display_results(session.score, total_questions, session.selected_options())
 
+@instrument
 def display_results(score, total_questions, user_answers):
     print(f"Your final score is {score}/{total_questions}.\n")
     print("Correct Answers:")
@@ -66,4 +72,25 @@ def display_results(score, total_questions, user_answers):
         i += 1
 
 if __name__ == "__main__":
+    # Optionally play questions picked from an external bank instead of the ones above
+    parser = argparse.ArgumentParser(description="A simple multiple-choice Python quiz.")
+    parser.add_argument("--bank", help="question bank to pick questions from (.jsonl or .db)")
+    parser.add_argument("--topic", help="only pick questions on this topic")
+    parser.add_argument("--difficulty", help="only pick questions of this difficulty")
+    parser.add_argument("--count", type=int, default=5, help="number of questions to pick from the bank")
+    args = parser.parse_args()
+    if args.bank:
+        try:
+            bank = open_question_bank(args.bank)
+        except OSError as e:
+            print(f"Error: could not read {args.bank}: {e.strerror}", file=sys.stderr)
+            raise SystemExit(1)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            raise SystemExit(1)
+        questions = bank.sample(args.count, args.topic, args.difficulty)
+        bank.close()
+        if not questions:
+            print("No questions in the bank match that topic and difficulty.")
+            raise SystemExit(1)
     run_quiz()
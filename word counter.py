@@ -1,6 +1,46 @@
 # ================================================
 # Word Counter Program
 # ================================================
+#
+# Usage:
+#   python "word counter.py"                      # type a sentence or paragraph
+#   python "word counter.py" FILE [FILE ...]      # count the words in files ("-" reads stdin)
+#   some_command | python "word counter.py"       # count the words piped in on stdin
+#   python "word counter.py" --workers 8 big.txt  # split a large file across 8 processes
+#   python "word counter.py" --top 20 FILE ...    # the 20 most common words
+#   python "word counter.py" --check FILE         # make sure the fast byte-level path agrees with count_words
+#   python "word counter.py" --self-check         # compare the byte path and count_words on tricky inputs
+#   python "word counter.py" --instrument=stats.json FILE  # record call counts, timings and memory peaks
+
+import argparse
+import codecs
+import heapq
+import mmap
+import os
+import random
+import stat
+import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+instrumentation.configure()  # On with INSTRUMENT=FILE or --instrument[=FILE]; see instrumentation.py
+from instrumentation import instrument
+
+CHUNK_SIZE = 1024 * 1024  # Characters (or bytes) read at a time when streaming
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024  # Files smaller than this are counted in a single process
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c"  # Bytes that can never be part of a multi-byte UTF-8 character
+MAX_WORDS = 1_000_000  # Distinct words kept in memory before spilling to disk (or pruning, if approximate)
+MAX_SPILL_FILES = 32  # Spill files are merged into one when there are more than this
+MMAP_WINDOW = 64 * 1024 * 1024  # Bytes of a memory-mapped file examined at a time by the fast path
+# Every byte value that str.split() treats as whitespace on its own
+SPLIT_WHITESPACE_BYTES = b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+# UTF-8 encodings of the non-ASCII characters str.split() treats as whitespace (U+0085, U+00A0,
+# U+1680, U+2000-U+200A, U+2028, U+2029, U+202F, U+205F, U+3000; all below U+10000). Any other
+# non-ASCII byte belongs to a character that is part of a word, e.g. curly quotes and dashes.
+UNICODE_WHITESPACE = [chr(code).encode("utf-8") for code in range(0x80, 0x10000) if chr(code).isspace()]
 
 ### User Input Section ###
 
@@ -13,19 +53,577 @@ def get_user_input():
     return user_input
 
 ### Word Counting Logic Section ###
+@instrument
 def count_words(input_string):
     """
     Counts the number of words in the given input string.
     Returns the word count as an integer.
     """
+    # Split the cleaned-up string into words
+    words = split_words(input_string)
+    
+    # Return the number of words
+    return len(words)
+
+def split_words(input_string):
+    """
+    Splits the given input string into words the way count_words counts them.
+    Returns a list of lowercase words.
+    """
     # Remove leading/trailing whitespaces and convert to lowercase
     cleaned_string = input_string.strip().lower()
     
     # Split the string into words (assuming spaces as delimiters)
-    words = cleaned_string.split()
-    
-    # Return the number of words
-    return len(words)
+    return cleaned_string.split()
+
+### Streaming Word Counting Section ###
+@instrument
+def count_words_in_stream(stream, chunk_size=CHUNK_SIZE):
+    """
+    Counts the words in a text stream (an open file or stdin) one chunk at a time,
+    so memory use stays the same however large the input is.
+    A word split across two chunks is counted once.
+    Returns the word count as an integer.
+    """
+    total = 0
+    in_word = False  # True if the previous chunk ended in the middle of a word
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        total += _count_chunk(chunk, in_word)
+        in_word = not chunk[-1].isspace()
+    return total
+
+def _count_chunk(chunk, in_word):
+    """
+    Counts the words in one chunk of text. If the previous chunk ended inside a word
+    and this one starts with the rest of it, that word has already been counted.
+    """
+    # Splitting one bounded chunk at a time keeps memory flat; the words of the
+    # whole input are never held at once
+    count = count_words(chunk)
+    if in_word and not chunk[0].isspace():
+        count -= 1
+    return count
+
+def _count_range(path, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Counts the words in bytes [start, end) of a UTF-8 file. Used by the process pool;
+    ranges always begin and end on whitespace, so no word is shared between two ranges.
+    """
+    total = 0
+    in_word = False
+    for chunk in _read_range(path, start, end, chunk_size):
+        total += _count_chunk(chunk, in_word)
+        in_word = not chunk[-1].isspace()
+    return total
+
+def _read_range(path, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Yields the text in bytes [start, end) of a UTF-8 file, one decoded chunk at a time.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            chunk = decoder.decode(data, final=remaining == 0)
+            if chunk:
+                yield chunk
+
+def _is_regular_file(path):
+    """
+    Returns True for an ordinary file on disk. Pipes, FIFOs and devices (e.g. <(command)
+    in bash) report a size of 0 and can't be seeked or memory-mapped, so they are streamed.
+    """
+    return stat.S_ISREG(os.stat(path).st_mode)
+
+def _split_points(path, size, parts):
+    """
+    Picks up to `parts - 1` byte offsets that split the file into roughly equal ranges.
+    Each offset is moved forward to the next ASCII whitespace byte so that no word
+    (and no multi-byte UTF-8 character) is cut in two.
+    """
+    points = [0]
+    with open(path, "rb") as file:
+        for i in range(1, parts):
+            position = max(size * i // parts, points[-1])
+            file.seek(position)
+            while True:
+                block = file.read(64 * 1024)
+                if not block:
+                    position = size
+                    break
+                offsets = [block.find(byte) for byte in ASCII_WHITESPACE]
+                offsets = [offset for offset in offsets if offset != -1]
+                if offsets:
+                    position += min(offsets)
+                    break
+                position += len(block)
+            if position >= size:
+                break
+            if position > points[-1]:
+                points.append(position)
+    points.append(size)
+    return points
+
+@instrument
+def count_words_in_file(path, workers=1, chunk_size=CHUNK_SIZE, use_mmap=True):
+    """
+    Counts the words in a UTF-8 text file ("-" means stdin).
+    With workers > 1, a large file is split into ranges that are counted in a
+    process pool and the counts are added up. Otherwise the memory-mapped byte
+    path is tried first (unless use_mmap is False), then the file is streamed.
+    Pipes and FIFOs are always streamed.
+    Returns the word count as an integer.
+    """
+    if path == "-":
+        return count_words_in_stream(sys.stdin, chunk_size)
+    size = os.path.getsize(path) if _is_regular_file(path) else 0
+    if workers > 1 and size >= PARALLEL_MIN_SIZE:
+        points = _split_points(path, size, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = pool.map(_count_range, [path] * (len(points) - 1), points[:-1], points[1:],
+                              [chunk_size] * (len(points) - 1))
+            return sum(counts)
+    if use_mmap:
+        word_count = count_words_mmap(path)
+        if word_count is not None:
+            return word_count
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return count_words_in_stream(file, chunk_size)
+
+### Memory-Mapped Fast Path Section ###
+def count_words_mmap(path, window=MMAP_WINDOW):
+    """
+    Counts the words in a file directly on its bytes, without decoding it to text:
+    the file is memory-mapped and NumPy counts every whitespace -> non-whitespace edge.
+    Returns the word count, or None when the fast path can't be used (NumPy isn't
+    installed, the file contains non-ASCII whitespace that needs full Unicode rules,
+    or it isn't a regular file that can be memory-mapped).
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    try:
+        if not _is_regular_file(path):
+            return None
+        if os.path.getsize(path) == 0:
+            return 0
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # NumPy views of the map must be gone before it is closed, so the work is done in a helper
+            return _count_mapped_words(np, mapped, window)
+    except (OSError, ValueError):
+        return None  # The text path reads the file instead (and reports a real error, if any)
+
+def _count_mapped_words(np, buffer, window):
+    """
+    Counts the words in a bytes-like buffer one window at a time.
+    Returns None if the buffer contains a Unicode whitespace character.
+    """
+    is_whitespace = np.zeros(256, dtype=bool)
+    is_whitespace[list(SPLIT_WHITESPACE_BYTES)] = True
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    total = 0
+    previous_is_space = True  # The start of the file counts as whitespace
+    for start in range(0, len(data), window):
+        block = data[start:start + window]
+        if _has_unicode_whitespace(np, data, start, len(block)):
+            return None
+        spaces = is_whitespace[block]
+        # A word starts wherever a non-whitespace byte follows a whitespace byte
+        total += int(np.count_nonzero(spaces[:-1] & ~spaces[1:]))
+        if previous_is_space and not spaces[0]:
+            total += 1
+        previous_is_space = bool(spaces[-1])
+    return total
+
+def _has_unicode_whitespace(np, data, start, length):
+    """
+    Returns True if one of the UNICODE_WHITESPACE byte sequences starts in data[start:start + length].
+    Only the few bytes that can start one are looked at; a sequence may run into the next window.
+    """
+    is_lead = np.zeros(256, dtype=bool)
+    is_lead[[sequence[0] for sequence in UNICODE_WHITESPACE]] = True
+    leads = np.flatnonzero(is_lead[data[start:start + length]]) + start
+    if not len(leads):
+        return False
+
+    def following(offset):
+        # The byte `offset` places after every lead byte (0 past the end of the data)
+        positions = leads + offset
+        values = data[np.minimum(positions, len(data) - 1)].astype(np.uint32)
+        values[positions >= len(data)] = 0
+        return values
+
+    first, second, third = following(0), following(1), following(2)
+    two_byte = [int.from_bytes(sequence, "big") for sequence in UNICODE_WHITESPACE if len(sequence) == 2]
+    three_byte = [int.from_bytes(sequence, "big") for sequence in UNICODE_WHITESPACE if len(sequence) == 3]
+    return bool(np.isin((first << 8) | second, two_byte).any()
+                or np.isin((first << 16) | (second << 8) | third, three_byte).any())
+
+def check_fast_path(path, chunk_size=CHUNK_SIZE):
+    """
+    Counts a file with both the memory-mapped byte path and the text path and prints whether they agree.
+    Returns the exit status (1 if they disagree or the file could not be read).
+    """
+    try:
+        fast_count = count_words_mmap(path)
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            text_count = count_words_in_stream(file, chunk_size)
+    except OSError as e:
+        print(f"Error: could not read {path}: {e.strerror}", file=sys.stderr)
+        return 1
+    if fast_count is None:
+        print(f"{path}: fast path not used (needs Unicode whitespace rules or NumPy is missing); text path: {text_count}")
+        return 0
+    if fast_count != text_count:
+        print(f"{path}: MISMATCH - fast path: {fast_count}, text path: {text_count}")
+        return 1
+    print(f"{path}: OK - both paths count {fast_count} words")
+    return 0
+
+### Self-Check Section ###
+def self_check(rounds=300):
+    """
+    Checks that the memory-mapped byte path counts exactly like count_words on inputs built to
+    catch mistakes: words across window boundaries, the \\x1c-\\x1f separators, curly quotes and
+    dashes (fast path), every Unicode whitespace character (fallback) and invalid UTF-8.
+    Returns the exit status (1 if NumPy is missing, so the byte path can't run).
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        print("NumPy is not installed; the memory-mapped byte path is never used.")
+        return 1
+    pieces = [b"word", b"a", b"caf\xc3\xa9", b"\xe2\x80\x9cquoted\xe2\x80\x9d", b"\xe2\x80\x94", b"\xe6\x97\xa5\xe6\x9c\xac",
+              b" ", b"\t", b"\n", b"\r\n", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\x1f",
+              b"\xff", b"\xc2", b"\xe2\x80", b"\x80", b"\xed\xa0\x80"]  # The last five are invalid UTF-8
+    rng = random.Random(8)
+    used_fast_path = 0
+    for round_number in range(rounds):
+        data = b"".join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+        text = data.decode("utf-8", errors="replace")
+        expected = count_words(text)
+        window = rng.randint(1, 8)  # Tiny windows put a boundary inside almost every word
+        counted = _count_mapped_words(np, data, window)
+        if any(character.isspace() and not character.isascii() for character in text):
+            # Pieces can join into a whitespace character (e.g. "\xe2\x80" + "\x80" is U+2000)
+            assert counted is None, f"{data!r}: Unicode whitespace was not noticed"
+            continue
+        assert counted is not None, f"fast path refused {data!r}"
+        assert counted == expected, f"{data!r} (window {window}): fast path {counted}, count_words {expected}"
+        used_fast_path += 1
+    for sequence in UNICODE_WHITESPACE:
+        for window in (1, 2, 3, 64):
+            data = b"one" + sequence + b"two\x1fthree"
+            assert _count_mapped_words(np, data, window) is None, f"{sequence!r} did not fall back"
+    # Whole files, including one that falls back to the text path and one read through a pipe
+    texts = [b"", b"   ", b"one two\x1cthree", b"no\xc2\xa0break space", b"bad \xff\xfe bytes \xe2\x80"]
+    for data in texts:
+        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as file:
+            file.write(data)
+        try:
+            expected = count_words(data.decode("utf-8", errors="replace"))
+            assert count_words_in_file(file.name) == expected, f"{data!r}: count_words_in_file disagrees"
+            fast = count_words_mmap(file.name, window=2)
+            assert fast is None or fast == expected, f"{data!r}: count_words_mmap disagrees"
+        finally:
+            os.remove(file.name)
+    if hasattr(os, "mkfifo"):
+        fifo = os.path.join(tempfile.mkdtemp(), "fifo")
+        os.mkfifo(fifo)
+        writer = threading.Thread(target=lambda: open(fifo, "wb").write(b"five words in a pipe"))
+        writer.start()
+        try:
+            assert count_words_in_file(fifo) == 5, "a FIFO was not streamed"
+        finally:
+            writer.join()
+            os.remove(fifo)
+            os.rmdir(os.path.dirname(fifo))
+    print(f"OK: the byte path matched count_words on {used_fast_path} random inputs, fell back on all "
+          f"{len(UNICODE_WHITESPACE)} Unicode whitespace characters, and files and pipes agree.")
+    return 0
+
+@instrument
+def count_files(paths, workers=1, chunk_size=CHUNK_SIZE, use_mmap=True):
+    """
+    Counts and prints the words in each file, plus a total when there are several.
+    Returns the exit status (1 if a file could not be read).
+    """
+    status = 0
+    grand_total = 0
+    for path in paths:
+        try:
+            word_count = count_words_in_file(path, workers, chunk_size, use_mmap)
+        except OSError as e:
+            print(f"Error: could not read {path}: {e.strerror}", file=sys.stderr)
+            status = 1
+            continue
+        grand_total += word_count
+        name = "stdin" if path == "-" else path
+        print(f"Word Count: {word_count}" if len(paths) == 1 else f"{name}: {word_count}")
+    if len(paths) > 1:
+        print(f"Total Word Count: {grand_total}")
+    return status
+
+### Word Frequency Section ###
+class WordFrequencies:
+    """
+    Counts how often each word appears, using the same words as count_words.
+
+    Words are streamed into a Counter. Once it holds more than `max_words`
+    distinct words, the counts are either written to a sorted temporary file
+    and cleared (exact), or, with approximate=True, pruned to the `max_words`
+    most common words (Space-Saving: counts may be overestimated by at most
+    `error`, and memory never grows past 2 * max_words words).
+    """
+
+    def __init__(self, max_words=MAX_WORDS, approximate=False, spill_dir=None):
+        self.max_words = max_words
+        self.approximate = approximate
+        self.spill_dir = spill_dir
+        self.counts = Counter()
+        self.total = 0  # Number of words counted (matches count_words)
+        self.error = 0  # Approximate mode: the largest count that may have been pruned
+        self.spill_files = []  # Exact mode: sorted "word<TAB>count" files written so far
+
+    def add_text(self, text):
+        """
+        Adds every word in a piece of text.
+        """
+        self.add_words(split_words(text))
+
+    def add_words(self, words):
+        """
+        Adds a list of already-normalized words (lowercase, no whitespace).
+        """
+        if self.approximate and self.error:
+            # Space-Saving: a word we have not kept may already have been seen up to `error` times
+            for word in words:
+                self.counts[word] = self.counts.get(word, self.error) + 1
+        else:
+            self.counts.update(words)
+        self.total += len(words)
+        self._check_budget()
+
+    def add_stream(self, stream, chunk_size=CHUNK_SIZE):
+        """
+        Adds every word in a text stream, reading it one chunk at a time.
+        """
+        self.add_chunks(iter(lambda: stream.read(chunk_size), ""))
+
+    def add_chunks(self, chunks):
+        """
+        Adds every word in a sequence of text chunks. A word split across two chunks is kept whole.
+        """
+        carry = ""  # Start of a word cut off at the end of the previous chunk
+        for chunk in chunks:
+            text = carry + chunk
+            cut = _last_word_start(text)
+            text, carry = text[:cut], text[cut:]
+            self.add_text(text)
+        self.add_text(carry)
+
+    def merge(self, other):
+        """
+        Adds the counts from another WordFrequencies (e.g. from another file or worker)
+        and deletes its temporary files.
+        """
+        for word, count in other.items():
+            self.counts[word] += count
+            if len(self.counts) > self.max_words:
+                self._check_budget()
+        self.total += other.total
+        self.error = max(self.error, other.error)
+        other.close()
+        self._check_budget()
+
+    def items(self):
+        """
+        Yields (word, count) pairs in alphabetical order, merging any spilled files.
+        """
+        sources = [sorted(self.counts.items())] + [_read_spill_file(path) for path in self.spill_files]
+        return _merge_sorted_counts(sources)
+
+    def most_common(self, k):
+        """
+        Returns the k most common words as a list of (word, count) pairs.
+        """
+        if not self.spill_files:
+            return self.counts.most_common(k)
+        return heapq.nlargest(k, self.items(), key=lambda item: item[1])
+
+    def close(self):
+        """
+        Deletes the temporary spill files.
+        """
+        for path in self.spill_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.spill_files = []
+
+    def _check_budget(self):
+        """
+        Spills or prunes the counter when it holds too many distinct words.
+        """
+        if self.approximate:
+            if len(self.counts) > 2 * self.max_words:
+                kept = self.counts.most_common(self.max_words)
+                self.error = max(self.error, kept[-1][1])
+                self.counts = Counter(dict(kept))
+        elif len(self.counts) > self.max_words:
+            fd, path = tempfile.mkstemp(prefix="word-freq-", suffix=".tsv", dir=self.spill_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                for word, count in sorted(self.counts.items()):
+                    file.write(f"{word}\t{count}\n")
+            self.spill_files.append(path)
+            self.counts = Counter()
+            if len(self.spill_files) > MAX_SPILL_FILES:
+                self._merge_spill_files()
+
+    def _merge_spill_files(self):
+        """
+        Merges all spill files into a single one, so items() never has too many files open.
+        """
+        fd, path = tempfile.mkstemp(prefix="word-freq-", suffix=".tsv", dir=self.spill_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            for word, count in _merge_sorted_counts([_read_spill_file(old) for old in self.spill_files]):
+                file.write(f"{word}\t{count}\n")
+        self.close()
+        self.spill_files = [path]
+
+def _merge_sorted_counts(sources):
+    """
+    Merges several alphabetically sorted sequences of (word, count) pairs,
+    adding up the counts of words that appear in more than one.
+    """
+    current_word, current_count = None, 0
+    for word, count in heapq.merge(*sources):
+        if word != current_word:
+            if current_word is not None:
+                yield current_word, current_count
+            current_word, current_count = word, 0
+        current_count += count
+    if current_word is not None:
+        yield current_word, current_count
+
+def _last_word_start(text):
+    """
+    Returns the index where the last (possibly unfinished) word of `text` starts,
+    or len(text) if it ends in whitespace.
+    """
+    index = len(text)
+    while index > 0 and not text[index - 1].isspace():
+        index -= 1
+    return index
+
+def _read_spill_file(path):
+    """
+    Yields the (word, count) pairs stored in a spill file.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            word, count = line.rstrip("\n").split("\t")
+            yield word, int(count)
+
+def _frequencies_in_range(path, start, end, max_words, approximate, chunk_size=CHUNK_SIZE):
+    """
+    Counts word frequencies in bytes [start, end) of a file. Runs in a worker process.
+    """
+    frequencies = WordFrequencies(max_words, approximate)
+    frequencies.add_chunks(_read_range(path, start, end, chunk_size))
+    return frequencies
+
+@instrument
+def count_frequencies_in_files(paths, workers=1, max_words=MAX_WORDS, approximate=False, chunk_size=CHUNK_SIZE):
+    """
+    Counts word frequencies over several files ("-" means stdin). With workers > 1,
+    files (and ranges of large files) are counted in a process pool and the
+    partial results are merged.
+    Returns a WordFrequencies.
+    """
+    frequencies = WordFrequencies(max_words, approximate)
+    ranges = []  # (path, start, end) pieces for the process pool
+    for path in paths:
+        if path == "-":
+            frequencies.add_stream(sys.stdin, chunk_size)
+            continue
+        if not _is_regular_file(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                frequencies.add_stream(file, chunk_size)
+            continue
+        size = os.path.getsize(path)
+        points = _split_points(path, size, workers) if workers > 1 and size >= PARALLEL_MIN_SIZE else [0, size]
+        ranges.extend((path, start, end) for start, end in zip(points[:-1], points[1:]))
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(_frequencies_in_range, *zip(*ranges), [max_words] * len(ranges),
+                             [approximate] * len(ranges), [chunk_size] * len(ranges))
+            for part in parts:
+                frequencies.merge(part)
+    else:
+        for path, start, end in ranges:
+            frequencies.add_chunks(_read_range(path, start, end, chunk_size))
+    return frequencies
+
+def print_top_words(paths, top, workers=1, max_words=MAX_WORDS, approximate=False, chunk_size=CHUNK_SIZE):
+    """
+    Prints the word count and the `top` most common words over all the files.
+    Returns the exit status (1 if a file could not be read).
+    """
+    try:
+        frequencies = count_frequencies_in_files(paths, workers, max_words, approximate, chunk_size)
+    except OSError as e:
+        if e.filename is not None and e.strerror is not None:
+            print(f"Error: could not read {e.filename}: {e.strerror}", file=sys.stderr)
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        print(f"Word Count: {frequencies.total}")
+        print(f"Top {top} words:")
+        for word, count in frequencies.most_common(top):
+            print(f"{count:>10}  {word}")
+        if frequencies.error:
+            print(f"(approximate: counts may be too high by up to {frequencies.error})")
+    finally:
+        frequencies.close()
+    return 0
+
+def parse_arguments(argv=None):
+    """
+    Reads the command line options for counting files and stdin.
+    """
+    parser = argparse.ArgumentParser(description="Count the words in a sentence, files or piped stdin.")
+    parser.add_argument("files", nargs="*", help='files to count ("-" reads stdin); with none, asks for a sentence')
+    parser.add_argument("--workers", type=int, default=1,
+                        help="split files of 64 MiB or more across this many processes instead of "
+                             "using the memory-mapped byte path (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"characters read at a time (default: {CHUNK_SIZE})")
+    parser.add_argument("--no-mmap", dest="use_mmap", action="store_false",
+                        help="always decode the files to text instead of trying the memory-mapped byte path")
+    parser.add_argument("--check", action="store_true",
+                        help="count each file with both the byte path and the text path and report whether they agree")
+    parser.add_argument("--self-check", action="store_true",
+                        help="compare the byte path with count_words on generated tricky inputs and exit")
+    parser.add_argument("--top", type=int, metavar="K",
+                        help="print the K most common words instead of just the count")
+    parser.add_argument("--max-words", type=int, default=MAX_WORDS,
+                        help=f"distinct words kept in memory before spilling to disk (default: {MAX_WORDS})")
+    parser.add_argument("--approximate", action="store_true",
+                        help="with --top, prune rare words instead of spilling to disk (bounded memory, approximate counts)")
+    return parser.parse_args(argv)
 
 ### Error Handling & Output Display Section ###
 def main():
@@ -55,7 +653,18 @@ def main():
 ### Program Entry Point ###
 
 if __name__ == "__main__":
-    main()
+    args = parse_arguments()
+    files = args.files or ([] if sys.stdin.isatty() or args.self_check else ["-"])
+    if args.self_check:
+        sys.exit(self_check())
+    elif files and args.check:
+        sys.exit(max((check_fast_path(path, args.chunk_size) for path in files if path != "-"), default=0))
+    elif files and args.top:
+        sys.exit(print_top_words(files, args.top, args.workers, args.max_words, args.approximate, args.chunk_size))
+    elif files:
+        sys.exit(count_files(files, args.workers, args.chunk_size, args.use_mmap))
+    else:
+        main()
 
 
 